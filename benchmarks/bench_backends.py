@@ -0,0 +1,99 @@
+"""Compare inference backends on CPU: load time, latency and peak memory.
+
+Each backend runs in its own process so peak RSS is not shared between
+them. Backends whose model file or runtime is missing are skipped; 'stub'
+(benchmarks/common.StubModel) always runs and shows the harness overhead.
+
+Create the exported models first, e.g.:
+  python -m src.cli export --format tflite -o models/violence_detection_model.tflite
+  python -m src.cli export --format onnx -o models/violence_detection_model.onnx
+
+Usage: python benchmarks/bench_backends.py [--backends stub keras tflite onnx] [--batch-sizes 1 8]
+                                           [--threads 0] [--runs 20] [--output results.json]
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+CHILD = r'''
+import json, os, resource, sys, time
+sys.path.insert(0, os.path.join(ROOT, 'benchmarks'))
+sys.path.insert(0, ROOT)
+import numpy as np
+from common import MODEL_CONFIG, StubModel
+from src.core.backends import KerasBackend, create_backend, time_backend
+
+started = time.perf_counter()
+if BACKEND == 'stub':
+    backend = StubModel(MODEL_CONFIG)
+elif BACKEND == 'keras':
+    from src.core.model_loader import load_model_artifact
+    backend = KerasBackend(load_model_artifact(PATH))
+else:
+    backend = create_backend(BACKEND, path=PATH, num_threads=THREADS)
+load_time = time.perf_counter() - started
+
+shape = [d for d in backend.input_shape[1:]]
+defaults = (MODEL_CONFIG['SEQUENCE_LENGTH'], MODEL_CONFIG['IMAGE_HEIGHT'],
+            MODEL_CONFIG['IMAGE_WIDTH'], 3)
+shape = tuple(d if d else default for d, default in zip(shape, defaults))
+rng = np.random.default_rng(0)
+latency = {}
+for batch_size in BATCH_SIZES:
+    batch = rng.random((batch_size,) + shape, dtype=np.float32)
+    times = np.array(time_backend(backend, batch, RUNS)) * 1000.0
+    latency[batch_size] = {'p50_ms': float(np.percentile(times, 50)), 'p95_ms': float(np.percentile(times, 95)),
+                           'windows_per_second': float(batch_size * 1000.0 / times.mean())}
+# ru_maxrss is in KB on Linux
+peak_mb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024.0
+print(json.dumps({'load_seconds': load_time, 'peak_rss_mb': peak_mb, 'latency': latency}))
+'''
+
+def run_backend(backend, path, batch_sizes, threads, runs):
+    code = (f"ROOT = {ROOT!r}\nBACKEND = {backend!r}\nPATH = {path!r}\nBATCH_SIZES = {batch_sizes!r}\n"
+            f"THREADS = {threads!r}\nRUNS = {runs!r}\n") + CHILD
+    result = subprocess.run([sys.executable, '-c', code], capture_output=True, text=True, cwd=ROOT)
+    if result.returncode != 0:
+        return {'error': result.stderr.strip().splitlines()[-1] if result.stderr.strip() else 'failed'}
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--backends', nargs='+', default=['stub', 'keras', 'tflite', 'onnx'])
+    parser.add_argument('--model', default=os.path.join(ROOT, 'models', 'violence_detection_model.joblib'))
+    parser.add_argument('--tflite', default=os.path.join(ROOT, 'models', 'violence_detection_model.tflite'))
+    parser.add_argument('--onnx', default=os.path.join(ROOT, 'models', 'violence_detection_model.onnx'))
+    parser.add_argument('--batch-sizes', type=int, nargs='+', default=[1, 8])
+    parser.add_argument('--threads', type=int, default=0, help='Inference threads for tflite / onnx')
+    parser.add_argument('--runs', type=int, default=20)
+    parser.add_argument('--output', default=None, help='Write results as JSON')
+    args = parser.parse_args()
+
+    paths = {'stub': None, 'keras': args.model, 'tflite': args.tflite, 'onnx': args.onnx}
+    results = {}
+    for backend in args.backends:
+        path = paths.get(backend)
+        if backend != 'stub' and (path is None or not os.path.exists(path)):
+            results[backend] = {'error': f'no model file at {path}'}
+            continue
+        results[backend] = run_backend(backend, path, args.batch_sizes, args.threads, args.runs)
+
+    print(f"{'backend':>8} {'load s':>7} {'peak MB':>8} {'batch':>6} {'p50 ms':>8} {'p95 ms':>8} {'win/s':>8}")
+    for backend, result in results.items():
+        if 'error' in result:
+            print(f"{backend:>8}  skipped: {result['error']}")
+            continue
+        for batch_size, latency in result['latency'].items():
+            print(f"{backend:>8} {result['load_seconds']:7.2f} {result['peak_rss_mb']:8.0f} {batch_size:>6} "
+                  f"{latency['p50_ms']:8.2f} {latency['p95_ms']:8.2f} {latency['windows_per_second']:8.1f}")
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(results, f, indent=2)
+
+if __name__ == '__main__':
+    sys.exit(main())
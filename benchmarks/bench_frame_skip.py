@@ -0,0 +1,66 @@
+"""Compare decode cost of read(), grab() and seek based frame skipping.
+
+Usage: python benchmarks/bench_frame_skip.py [--frames 300] [--width 1280] [--height 720]
+"""
+import argparse
+import os
+import time
+
+from common import StaticConfigManager, make_synthetic_video
+
+import cv2
+from src.core.video_service import VideoService
+
+def read_all_legacy(path, skip):
+    """Baseline: decode every skipped frame with read()"""
+    cap = cv2.VideoCapture(path)
+    delivered = 0
+    while True:
+        frame = None
+        for _ in range(skip + 1):
+            ret, frame = cap.read()
+            if not ret:
+                cap.release()
+                return delivered
+        delivered += 1
+
+def read_all_service(path, skip, seek_min_skip):
+    """Current VideoService path (grab for skipped frames, seek for large skips)"""
+    config = StaticConfigManager({'capture': {'threaded': False, 'seek_min_skip': seek_min_skip}})
+    service = VideoService(config, 16)
+    service.processing_settings = dict(service.processing_settings, frame_skip=skip)
+    service.start_video_capture(path)
+    delivered = 0
+    while service.get_frame() is not None:
+        delivered += 1
+    service.release()
+    return delivered
+
+def measure(fn, *args):
+    wall = time.perf_counter()
+    cpu = time.process_time()
+    delivered = fn(*args)
+    return delivered, time.perf_counter() - wall, time.process_time() - cpu
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--frames', type=int, default=300)
+    parser.add_argument('--width', type=int, default=1280)
+    parser.add_argument('--height', type=int, default=720)
+    args = parser.parse_args()
+
+    path = make_synthetic_video(args.frames, args.width, args.height)
+    try:
+        print(f"{'skip':>4} {'method':>8} {'frames':>7} {'wall s':>8} {'cpu s':>8}")
+        for skip in (0, 1, 2, 4, 8, 16):
+            runs = [('read', read_all_legacy, (path, skip)),
+                    ('grab', read_all_service, (path, skip, 10 ** 9)),
+                    ('seek', read_all_service, (path, skip, 1))]
+            for name, fn, fn_args in runs:
+                delivered, wall, cpu = measure(fn, *fn_args)
+                print(f"{skip:>4} {name:>8} {delivered:>7} {wall:>8.3f} {cpu:>8.3f}")
+    finally:
+        os.remove(path)
+
+if __name__ == '__main__':
+    main()
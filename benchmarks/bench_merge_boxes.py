@@ -0,0 +1,96 @@
+"""Check and time MotionDetector.merge_boxes against the original implementation.
+
+Suppress mode must return exactly what the original np.delete loop returned.
+Union mode is timed alongside and checked to leave no overlapping boxes.
+
+Usage: python benchmarks/bench_merge_boxes.py [--runs 20] [--seed 0]
+"""
+import argparse
+import sys
+import time
+
+import common  # noqa: F401  (adds the project root to sys.path)
+
+import numpy as np
+from src.core.motion_detector import MotionDetector
+
+def legacy_merge_boxes(boxes):
+    """The original suppression loop, kept as the reference"""
+    if not boxes:
+        return []
+    boxes_array = np.array([[x, y, x + w, y + h] for (x, y, w, h) in boxes])
+    areas = (boxes_array[:, 2] - boxes_array[:, 0]) * (boxes_array[:, 3] - boxes_array[:, 1])
+    idxs = areas.argsort()
+    pick = []
+    while len(idxs) > 0:
+        last = len(idxs) - 1
+        i = idxs[last]
+        pick.append(i)
+        xx1 = np.maximum(boxes_array[i, 0], boxes_array[idxs[:last], 0])
+        yy1 = np.maximum(boxes_array[i, 1], boxes_array[idxs[:last], 1])
+        xx2 = np.minimum(boxes_array[i, 2], boxes_array[idxs[:last], 2])
+        yy2 = np.minimum(boxes_array[i, 3], boxes_array[idxs[:last], 3])
+        w = np.maximum(0, xx2 - xx1)
+        h = np.maximum(0, yy2 - yy1)
+        overlap = (w * h) / areas[idxs[:last]]
+        idxs = np.delete(idxs, np.concatenate(([last], np.where(overlap > 0.3)[0])))
+    return [(int(x1), int(y1), int(x2 - x1), int(y2 - y1)) for x1, y1, x2, y2 in boxes_array[pick]]
+
+def random_boxes(count, rng, width=1920, height=1080):
+    """Noisy-scene boxes: many small, heavily overlapping rectangles"""
+    w = rng.integers(8, 120, count)
+    h = rng.integers(8, 120, count)
+    x = rng.integers(0, width - 120, count)
+    y = rng.integers(0, height - 120, count)
+    return [tuple(int(v) for v in box) for box in zip(x, y, w, h)]
+
+def overlaps(merged, threshold):
+    """True if any two union-merged boxes still overlap above the threshold"""
+    for a in range(len(merged)):
+        for b in range(a + 1, len(merged)):
+            ax, ay, aw, ah = merged[a]
+            bx, by, bw, bh = merged[b]
+            inter = max(0, min(ax + aw, bx + bw) - max(ax, bx)) * max(0, min(ay + ah, by + bh) - max(ay, by))
+            if inter > threshold * min(aw * ah, bw * bh):
+                return True
+    return False
+
+def time_per_call(fn, boxes, runs):
+    started = time.perf_counter()
+    for _ in range(runs):
+        fn(boxes)
+    return (time.perf_counter() - started) / runs
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--runs', type=int, default=20)
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(args.seed)
+    suppress = MotionDetector(merge_mode='suppress')
+    union = MotionDetector(merge_mode='union')
+    failures = 0
+
+    print(f"{'boxes':>6} {'legacy ms':>10} {'suppress ms':>12} {'union ms':>9} {'kept':>5} {'unions':>7} {'match':>6}")
+    for count in (10, 100, 1000):
+        boxes = random_boxes(count, rng)
+        expected = legacy_merge_boxes(boxes)
+        actual = suppress.merge_boxes(boxes)
+        unions = union.merge_boxes(boxes)
+        match = actual == expected and not overlaps(unions, union.merge_threshold)
+        failures += not match
+
+        runs = max(1, args.runs // (10 if count >= 1000 else 1))
+        legacy_time = time_per_call(legacy_merge_boxes, boxes, runs)
+        suppress_time = time_per_call(suppress.merge_boxes, boxes, runs)
+        union_time = time_per_call(union.merge_boxes, boxes, runs)
+        print(f"{count:>6} {legacy_time * 1000:>10.3f} {suppress_time * 1000:>12.3f} {union_time * 1000:>9.3f} "
+              f"{len(actual):>5} {len(unions):>7} {str(match):>6}")
+
+    if failures:
+        print(f"{failures} case(s) differ from the reference")
+        sys.exit(1)
+
+if __name__ == '__main__':
+    main()
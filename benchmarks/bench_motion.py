@@ -0,0 +1,35 @@
+"""Per-frame motion detection cost at several analysis resolutions.
+
+Usage: python benchmarks/bench_motion.py [--width 1920] [--height 1080] [--frames 200]
+"""
+import argparse
+import time
+
+from common import make_synthetic_frame
+
+from src.core.motion_detector import MotionDetector
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--width', type=int, default=1920)
+    parser.add_argument('--height', type=int, default=1080)
+    parser.add_argument('--frames', type=int, default=200)
+    args = parser.parse_args()
+
+    frames = [make_synthetic_frame(args.width, args.height, i) for i in range(args.frames)]
+    print(f"{'analysis width':>15} {'ms/frame':>9} {'boxes/frame':>12}")
+    for analysis_width in (None, 1280, 960, 640, 320, 160):
+        detector = MotionDetector(analysis_width)
+        # Let the background model settle before timing
+        for frame in frames[:20]:
+            detector.detect_motion(frame)
+        boxes = 0
+        started = time.perf_counter()
+        for frame in frames:
+            boxes += len(detector.detect_motion(frame))
+        elapsed = (time.perf_counter() - started) / len(frames)
+        label = 'full' if analysis_width is None else str(analysis_width)
+        print(f"{label:>15} {elapsed * 1000:>9.2f} {boxes / len(frames):>12.1f}")
+
+if __name__ == '__main__':
+    main()
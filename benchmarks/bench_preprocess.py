@@ -0,0 +1,68 @@
+"""Measure allocation and time of preprocessing one frame for the model.
+
+Both paths make the same resize call on the same frame, so only the scaling
+step differs: the original float64 division returning a new array, against
+ModelService.preprocess_frame's single float32 scale written into a
+preallocated ring buffer slot. The outputs are also checked to match.
+
+Usage: python benchmarks/bench_preprocess.py [--width 1920] [--height 1080] [--runs 20]
+"""
+import argparse
+import sys
+import time
+import tracemalloc
+
+from common import MODEL_CONFIG, StaticConfigManager, make_model_service, make_synthetic_frame
+
+import cv2
+import numpy as np
+
+def legacy_preprocess_frame(model_service, frame):
+    """Same resize as preprocess_frame, then the original float64 normalization"""
+    resized = cv2.resize(frame, (model_service.image_width, model_service.image_height),
+                         interpolation=model_service.interpolation)
+    return resized / 255.0
+
+def measure(fn, runs):
+    """Return (peak bytes allocated per call, seconds per call)"""
+    fn()  # Warm up caches and lazy allocations
+    tracemalloc.start()
+    peak = 0
+    started = time.perf_counter()
+    for _ in range(runs):
+        tracemalloc.reset_peak()
+        before = tracemalloc.get_traced_memory()[0]
+        fn()
+        peak = max(peak, tracemalloc.get_traced_memory()[1] - before)
+    elapsed = (time.perf_counter() - started) / runs
+    tracemalloc.stop()
+    return peak, elapsed
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--width', type=int, default=1920)
+    parser.add_argument('--height', type=int, default=1080)
+    parser.add_argument('--runs', type=int, default=20)
+    args = parser.parse_args()
+
+    model_config = dict(MODEL_CONFIG, IMAGE_HEIGHT=224, IMAGE_WIDTH=224)
+    model_service = make_model_service(StaticConfigManager(), model_config)
+    frame = make_synthetic_frame(args.width, args.height)
+    slot = model_service.create_frame_buffer().next_slot()
+
+    max_diff = float(np.abs(legacy_preprocess_frame(model_service, frame) -
+                            model_service.preprocess_frame(frame, out=slot)).max())
+    legacy = measure(lambda: legacy_preprocess_frame(model_service, frame), args.runs)
+    current = measure(lambda: model_service.preprocess_frame(frame, out=slot), args.runs)
+
+    print(f"{'path':>8} {'peak alloc MB':>14} {'ms/frame':>9}")
+    for name, (peak, elapsed) in (('legacy', legacy), ('current', current)):
+        print(f"{name:>8} {peak / 1e6:>14.3f} {elapsed * 1000:>9.3f}")
+    print(f"max difference: {max_diff:.2e}")
+    # float32 rounding of values in [0, 1]
+    if max_diff > 1e-6:
+        print("Outputs differ")
+        sys.exit(1)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,113 @@
+"""Check and time the single-pass model input resize.
+
+In every performance mode, including for a non-square model, the model
+input must have shape (IMAGE_HEIGHT, IMAGE_WIDTH, 3) and match a reference
+resize of the capture frame. The reference is computed in numpy from
+separable pixel weights rather than with cv2. It must match within one gray
+level (OpenCV's fixed-point rounding), or exactly for nearest. The original
+double resize is timed alongside, and its deviation from the reference is
+reported for information.
+
+Usage: python benchmarks/bench_resize.py [--width 1920] [--height 1080] [--runs 50]
+"""
+import argparse
+import sys
+import time
+
+from common import MODEL_CONFIG, StaticConfigManager, make_model_service, make_synthetic_frame
+
+import cv2
+import numpy as np
+
+def legacy_resize(frame, image_height, image_width, resize_factor):
+    """The model input resize before the single-pass change"""
+    if resize_factor != 1.0:
+        h, w = frame.shape[:2]
+        frame = cv2.resize(frame, (int(w * resize_factor), int(h * resize_factor)))
+    return cv2.resize(frame, (image_height, image_width))
+
+def resize_weights(src, dst, interpolation):
+    """(dst, src) matrix of source pixel weights for each output pixel along one axis"""
+    scale = src / dst
+    weights = np.zeros((dst, src))
+    for d in range(dst):
+        if interpolation == 'nearest':
+            weights[d, min(int(np.floor(d * scale)), src - 1)] = 1.0
+        elif interpolation == 'linear':
+            # Pixel centers are aligned, edge pixels are repeated
+            x = (d + 0.5) * scale - 0.5
+            left = int(np.floor(x))
+            fraction = x - left
+            if left < 0:
+                left, fraction = 0, 0.0
+            if left >= src - 1:
+                left, fraction = src - 1, 0.0
+            weights[d, left] += 1.0 - fraction
+            if fraction:
+                weights[d, left + 1] += fraction
+        else:
+            # Average over the source area covered by the output pixel
+            start, end = d * scale, (d + 1) * scale
+            for s in range(int(np.floor(start)), min(int(np.ceil(end)), src)):
+                weights[d, s] = min(end, s + 1) - max(start, s)
+            weights[d] /= weights[d].sum()
+    return weights
+
+def reference_resize(frame, width, height, interpolation):
+    """Resize a downscaled frame with numpy only, as float64 gray levels"""
+    rows = resize_weights(frame.shape[0], height, interpolation)
+    cols = resize_weights(frame.shape[1], width, interpolation)
+    planes = frame.astype(np.float64).transpose(2, 0, 1)
+    return (rows @ planes @ cols.T).transpose(1, 2, 0)
+
+def time_per_call(fn, runs):
+    fn()
+    started = time.perf_counter()
+    for _ in range(runs):
+        fn()
+    return (time.perf_counter() - started) / runs
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--width', type=int, default=1920)
+    parser.add_argument('--height', type=int, default=1080)
+    parser.add_argument('--runs', type=int, default=50)
+    parser.add_argument('--interpolation', choices=('nearest', 'linear', 'area'), default='linear')
+    args = parser.parse_args()
+
+    frame = make_synthetic_frame(args.width, args.height, 5)
+    tolerance = 0.0 if args.interpolation == 'nearest' else 1.0
+    failures = 0
+    print(f"{'model':>9} {'mode':>5} {'legacy ms':>10} {'single ms':>10} {'legacy max diff':>16} "
+          f"{'max diff':>9} {'ok':>5}")
+    for height, width in ((224, 224), (112, 160)):
+        model_config = dict(MODEL_CONFIG, IMAGE_HEIGHT=height, IMAGE_WIDTH=width)
+        for mode in (0, 1, 2):
+            config_manager = StaticConfigManager({'performance_mode': mode,
+                                                  'model': {'resize_interpolation': args.interpolation}})
+            model_service = make_model_service(config_manager, model_config)
+            resize_factor = model_service.processing_settings['resize_factor']
+
+            reference = reference_resize(frame, width, height, args.interpolation)
+            actual = model_service.preprocess_frame(frame)
+            max_diff = (float(np.abs(actual.astype(np.float64) * 255.0 - reference).max())
+                        if actual.shape == (height, width, 3) else float('nan'))
+            ok = max_diff <= tolerance + 1e-3  # float32 scaling error
+            failures += not ok
+
+            legacy = legacy_resize(frame, height, width, resize_factor)
+            legacy_diff = (float(np.abs(legacy - reference).max())
+                           if legacy.shape == reference.shape else float('nan'))
+
+            legacy_time = time_per_call(lambda: legacy_resize(frame, height, width, resize_factor) / 255.0,
+                                        args.runs)
+            single_time = time_per_call(lambda: model_service.preprocess_frame(frame), args.runs)
+            print(f"{height:>4}x{width:<4} {mode:>5} {legacy_time * 1000:>10.3f} {single_time * 1000:>10.3f} "
+                  f"{legacy_diff:>16.1f} {max_diff:>9.2f} {str(ok):>5}")
+
+    if failures:
+        print(f"{failures} configuration(s) differ from the reference resize by more than {tolerance:g}")
+        sys.exit(1)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,108 @@
+"""Time each phase of application startup in fresh interpreters.
+
+Every run starts a new Python process so imports are measured cold (as far
+as the OS file cache allows). Phases:
+  imports        core services (OpenCV, NumPy) imported
+  services       config, ModelService with deferred loading, VideoService
+  window_shown   MainWindow constructed and shown (needs PyQt5; offscreen)
+  model_load     joblib.load of the model (needs --model to exist)
+  camera_probe   VideoService.get_available_cameras()
+time_to_window is what the user waits for now; eager_time_to_window adds
+model loading and camera probing, which used to happen before the window.
+
+Usage: python benchmarks/bench_startup.py [--runs 5] [--model models/violence_detection_model.joblib]
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+CHILD = r'''
+import json, os, sys, time
+started = time.perf_counter()
+phases = {}
+sys.path.insert(0, os.path.join(ROOT, 'benchmarks'))
+sys.path.insert(0, ROOT)
+from src.core.model_service import ModelService
+from src.core.video_service import VideoService
+phases['imports'] = time.perf_counter() - started
+
+t = time.perf_counter()
+from common import MODEL_CONFIG, StaticConfigManager
+config_manager = StaticConfigManager()
+model_service = ModelService(config_manager, MODEL_PATH, model_config=MODEL_CONFIG, defer_load=True)
+video_service = VideoService(config_manager, model_service.get_frame_sequence_size())
+phases['services'] = time.perf_counter() - t
+
+try:
+    os.environ.setdefault('QT_QPA_PLATFORM', 'offscreen')
+    from PyQt5.QtWidgets import QApplication
+except ImportError:
+    QApplication = None
+if QApplication is not None:
+    t = time.perf_counter()
+    app = QApplication([])
+    from src.ui.main_window import MainWindow
+    class QuietSound:
+        sound_enabled = False
+        def toggle_sound(self, enabled): pass
+        def play_alert(self): pass
+    # Keep the model from loading in the background while we measure
+    model_service.is_loaded = lambda: True
+    window = MainWindow(model_service, video_service, config_manager, QuietSound())
+    # Deferred work (camera list) runs from the event loop, which is not entered here
+    window.show()
+    phases['window_shown'] = time.perf_counter() - t
+
+if os.path.exists(MODEL_PATH):
+    t = time.perf_counter()
+    model_service.__dict__.pop('is_loaded', None)
+    model_service.load_model()
+    phases['model_load'] = time.perf_counter() - t
+
+t = time.perf_counter()
+video_service.get_available_cameras()
+phases['camera_probe'] = time.perf_counter() - t
+print(json.dumps(phases))
+'''
+
+def run_once(model_path):
+    code = f"ROOT = {ROOT!r}\nMODEL_PATH = {model_path!r}\n" + CHILD
+    result = subprocess.run([sys.executable, '-c', code], capture_output=True, text=True, cwd=ROOT)
+    if result.returncode != 0:
+        raise RuntimeError(result.stderr.strip())
+    # Other output (e.g. library banners) may precede the JSON line
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--runs', type=int, default=5)
+    parser.add_argument('--model', default=os.path.join(ROOT, 'models', 'violence_detection_model.joblib'))
+    parser.add_argument('--output', default=None, help='Write median phase times as JSON')
+    args = parser.parse_args()
+
+    runs = [run_once(args.model) for _ in range(args.runs)]
+    phases = [name for name in ('imports', 'services', 'window_shown', 'model_load', 'camera_probe')
+              if all(name in run for run in runs)]
+    medians = {name: statistics.median(run[name] for run in runs) for name in phases}
+    medians['time_to_window'] = sum(medians.get(name, 0.0) for name in ('imports', 'services', 'window_shown'))
+    medians['eager_time_to_window'] = medians['time_to_window'] + sum(
+        medians.get(name, 0.0) for name in ('model_load', 'camera_probe'))
+
+    print(f"{'phase':>22} {'median s':>9}")
+    for name, seconds in medians.items():
+        print(f"{name:>22} {seconds:9.3f}")
+    for name in ('window_shown', 'model_load'):
+        if name not in phases:
+            print(f"{name} not measured ({'PyQt5 missing' if name == 'window_shown' else 'no model file'})")
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump({'runs': runs, 'median': medians}, f, indent=2)
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,113 @@
+"""Check TFLiteBackend's quantization and batch resizing without TF Lite.
+
+A fake interpreter with the TF Lite Interpreter API runs a small numpy
+model. It quantizes and dequantizes its tensors exactly as a quantized TF
+Lite model would, and rejects inputs whose shape or dtype does not match
+the allocated tensor. For float, int8 and uint8 models this checks that:
+  - scores match the float model within the quantization error
+  - every batch size gets correct rows, and each size is allocated once
+
+Usage: python benchmarks/check_tflite_backend.py [--seed 0]
+"""
+import argparse
+import sys
+
+import common  # noqa: F401  (adds the project root to sys.path)
+
+import numpy as np
+from src.core.backends import TFLiteBackend
+
+INPUT_SHAPE = (4, 8, 8, 3)  # One window: frames, height, width, channels
+
+def reference_scores(batch):
+    """Float model: two class scores from the mean brightness of each window"""
+    brightness = batch.reshape(len(batch), -1).mean(axis=1)
+    return np.stack([1.0 - brightness, brightness], axis=1).astype(np.float32)
+
+class FakeInterpreter:
+    allocations = 0  # allocate_tensors() calls across all instances
+
+    def __init__(self, model_path=None, num_threads=None, dtype=np.float32):
+        self.dtype = dtype
+        if dtype == np.int8:
+            self.input_quantization, self.output_quantization = (1 / 255.0, -128), (1 / 256.0, -128)
+        elif dtype == np.uint8:
+            self.input_quantization, self.output_quantization = (1 / 255.0, 0), (1 / 256.0, 0)
+        else:
+            self.input_quantization = self.output_quantization = (0.0, 0)
+        self.shape = (1,) + INPUT_SHAPE
+        self.allocated = None
+        self.tensors = {}
+
+    def resize_tensor_input(self, index, shape):
+        self.shape = tuple(shape)
+        self.allocated = None
+
+    def allocate_tensors(self):
+        FakeInterpreter.allocations += 1
+        self.allocated = self.shape
+
+    def get_input_details(self):
+        return [{'index': 0, 'shape': np.array(self.shape), 'dtype': self.dtype,
+                 'quantization': self.input_quantization}]
+
+    def get_output_details(self):
+        return [{'index': 1, 'shape': np.array([self.shape[0], 2]), 'dtype': self.dtype,
+                 'quantization': self.output_quantization}]
+
+    def set_tensor(self, index, value):
+        if self.allocated is None or value.shape != self.allocated or value.dtype != self.dtype:
+            raise ValueError(f"Got {value.dtype}{value.shape}, allocated {np.dtype(self.dtype)}{self.allocated}")
+        self.tensors[index] = value
+
+    def invoke(self):
+        value = self.tensors[0]
+        scale, zero_point = self.input_quantization
+        if scale:
+            value = (value.astype(np.float32) - zero_point) * scale
+        scores = reference_scores(value)
+        scale, zero_point = self.output_quantization
+        if scale:
+            info = np.iinfo(self.dtype)
+            scores = np.clip(np.round(scores / scale + zero_point), info.min, info.max).astype(self.dtype)
+        self.tensors[1] = scores
+
+    def get_tensor(self, index):
+        return self.tensors[index]
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(args.seed)
+    batch_sizes = (1, 3, 8, 3, 1, 8)
+    failures = 0
+
+    print(f"{'dtype':>8} {'max diff':>9} {'tolerance':>10} {'allocations':>12} {'ok':>5}")
+    for dtype in (np.float32, np.int8, np.uint8):
+        FakeInterpreter.allocations = 0
+        backend = TFLiteBackend('fake.tflite', interpreter_class=lambda **kw: FakeInterpreter(dtype=dtype, **kw))
+        # Half an input step shifts the mean by at most that much, plus half an output step
+        tolerance = 0.5 / 255.0 + 0.5 / 256.0 + 1e-6 if dtype != np.float32 else 1e-6
+        max_diff, rows_ok = 0.0, True
+        for batch_size in batch_sizes:
+            batch = rng.random((batch_size,) + INPUT_SHAPE, dtype=np.float32)
+            scores = backend.predict(batch)
+            rows_ok &= scores.shape == (batch_size, 2)
+            max_diff = max(max_diff, float(np.abs(scores - reference_scores(batch)).max()))
+            # Rows do not depend on the batch they were scored in
+            rows_ok &= bool(np.allclose(backend.predict(batch[:1]), scores[:1]))
+        # The initial interpreter (size 1) plus one per other size, never reallocated
+        expected_allocations = len(set(batch_sizes))
+        ok = rows_ok and max_diff <= tolerance and FakeInterpreter.allocations == expected_allocations
+        failures += not ok
+        print(f"{np.dtype(dtype).name:>8} {max_diff:>9.5f} {tolerance:>10.5f} "
+              f"{FakeInterpreter.allocations:>5}/{expected_allocations:<6} {str(ok):>5}")
+
+    if failures:
+        print(f"{failures} model type(s) failed")
+        sys.exit(1)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,97 @@
+import os
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+# Make the project importable when run as `python benchmarks/<script>.py`
+sys.path.append(ROOT)
+
+import cv2
+import numpy as np
+from src.core.model_loader import load_model_config
+from src.utils.config import ConfigManager
+
+def make_synthetic_frame(width=1280, height=720, index=0, seed=0):
+    """Create a BGR frame with a moving block over low-level noise"""
+    rng = np.random.default_rng(seed + index)
+    frame = rng.integers(0, 32, (height, width, 3), dtype=np.uint8)
+    size = min(width, height) // 5
+    x = (index * 7) % max(1, width - size)
+    y = (index * 3) % max(1, height - size)
+    frame[y:y + size, x:x + size] = (40, 180, 220)
+    return frame
+
+def make_synthetic_video(num_frames=300, width=1280, height=720, fps=30.0, path=None):
+    """Write a synthetic video file and return its path"""
+    if path is None:
+        handle, path = tempfile.mkstemp(suffix='.avi')
+        os.close(handle)
+    writer = cv2.VideoWriter(path, cv2.VideoWriter_fourcc(*'MJPG'), fps, (width, height))
+    if not writer.isOpened():
+        raise RuntimeError(f"Could not open video writer for {path}")
+    for i in range(num_frames):
+        writer.write(make_synthetic_frame(width, height, i))
+    writer.release()
+    return path
+
+class StaticConfigManager(ConfigManager):
+    """ConfigManager built from defaults plus overrides, never touching config.json"""
+
+    def __init__(self, overrides=None):
+        self.config_path = None
+        self.config = self._update_with_defaults(dict(overrides or {}))
+
+    def save_config(self):
+        pass
+
+MODEL_CONFIG_PATH = os.path.join(ROOT, 'models', 'model_config.joblib')
+
+# Fallback with the layout of models/model_config.joblib, used only when it is
+# missing; its input size is a guess, not the trained model's
+STUB_MODEL_CONFIG = {
+    'SEQUENCE_LENGTH': 16,
+    'IMAGE_HEIGHT': 64,
+    'IMAGE_WIDTH': 64,
+    'CLASSES_LIST': ['NonViolence', 'Violence'],
+}
+
+def load_benchmark_model_config(path=MODEL_CONFIG_PATH):
+    """Return (model config, where it came from), preferring the trained model's config"""
+    if os.path.exists(path):
+        try:
+            return load_model_config(path), path
+        except Exception as e:
+            print(f"Could not load {path}, using the stub model config: {str(e)}")
+    return STUB_MODEL_CONFIG, 'stub'
+
+# Input shape and classes of the benchmarked model; MODEL_CONFIG_SOURCE labels
+# results run on the stub fallback
+MODEL_CONFIG, MODEL_CONFIG_SOURCE = load_benchmark_model_config()
+
+class StubModel:
+    """Stand-in for the Keras model with the same input and output shapes"""
+
+    def __init__(self, model_config=MODEL_CONFIG, cost=0.0):
+        self.input_shape = (None, model_config['SEQUENCE_LENGTH'], model_config['IMAGE_HEIGHT'],
+                            model_config['IMAGE_WIDTH'], 3)
+        self.num_classes = len(model_config['CLASSES_LIST'])
+        self.cost = cost  # Extra seconds per call to mimic a real model
+
+    def predict(self, batch, verbose=0):
+        batch = np.asarray(batch)
+        if batch.shape[1:] != self.input_shape[1:]:
+            raise ValueError(f"Expected input shape {self.input_shape}, got {batch.shape}")
+        if self.cost:
+            time.sleep(self.cost)
+        # Touch the whole input like a real forward pass would
+        score = batch.reshape(len(batch), -1).mean(axis=1, dtype=np.float32)
+        score = score / (float(batch.max()) or 1.0)
+        return np.stack([1.0 - score, score], axis=1)[:, :self.num_classes]
+
+def make_model_service(config_manager=None, model_config=MODEL_CONFIG, cost=0.0):
+    """Create a ModelService around StubModel"""
+    from src.core.model_service import ModelService
+    if config_manager is None:
+        config_manager = StaticConfigManager()
+    return ModelService(config_manager, model=StubModel(model_config, cost), model_config=model_config)
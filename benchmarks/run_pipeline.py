@@ -0,0 +1,181 @@
+"""End-to-end benchmark of the detection pipeline for each performance mode.
+
+Runs DetectionLoop, the per-frame loop DetectionWorker uses (analysis
+stages, scheduled and motion-gated inference, violence persistence, render
+stages paced by the display rate), headless on a synthetic video. The model
+is a stub shaped by models/model_config.joblib, or by a labelled stub config
+when that file is missing, so it needs no camera, GPU or trained model. Each
+mode is run twice: once for timing and once under tracemalloc for peak memory.
+
+Usage: python benchmarks/run_pipeline.py [--frames 300] [--model-cost 0.02]
+                                         [--output results.json] [--compare baseline.json]
+"""
+import argparse
+import json
+import os
+import platform
+import subprocess
+import sys
+import time
+import tracemalloc
+
+from common import MODEL_CONFIG, MODEL_CONFIG_SOURCE, StaticConfigManager, make_model_service, make_synthetic_video
+
+import cv2
+import numpy as np
+from src.core.detection_loop import DetectionLoop
+from src.core.video_service import VideoService
+from src.utils.metrics import registry
+
+MODES = {0: 'performance', 1: 'balanced', 2: 'quality'}
+DISPLAY_SIZE = (640, 480)
+
+def run_mode(path, mode, model_cost, overrides=None):
+    """Process the whole video in one performance mode, return per-frame latencies and counts"""
+    config_manager = StaticConfigManager(dict(overrides or {}, performance_mode=mode))
+    model_service = make_model_service(config_manager, MODEL_CONFIG, model_cost)
+    video_service = VideoService(config_manager, model_service.get_frame_sequence_size())
+    detection = DetectionLoop(video_service, model_service)
+    detection.set_display_size(*DISPLAY_SIZE)
+
+    if not video_service.start_video_capture(path):
+        raise RuntimeError(f"Could not open {path}")
+    latencies = []
+    inferred_before = model_service.windows_inferred.value
+    started = time.perf_counter()
+    try:
+        while True:
+            frame_started = time.perf_counter()
+            frame = video_service.get_frame()
+            if frame is None:
+                break
+            context = detection.process_frame(frame, time.time())
+            if context.rendered:
+                # Stands in for the GUI, which shows each frame at once
+                detection.frame_displayed()
+            latencies.append(time.perf_counter() - frame_started)
+    finally:
+        elapsed = time.perf_counter() - started
+        detection.stop()
+        video_service.release()
+    return {
+        'frames': len(latencies),
+        'inferences': model_service.windows_inferred.value - inferred_before,
+        'gated_skips': detection.motion_gate.skipped,
+        'elapsed': elapsed,
+        'latencies': latencies,
+    }
+
+def summarize(run, snapshot):
+    """Turn a timing run and a metrics snapshot into plain numbers"""
+    latencies = np.array(run['latencies']) * 1000.0
+    stages = {}
+    for name, value in snapshot.items():
+        if isinstance(value, dict) and value['count']:
+            stages[name.replace('_seconds', '')] = {
+                'count': value['count'],
+                'mean_ms': value['mean'] * 1000.0,
+                'per_second': value['count'] / run['elapsed'],
+            }
+    return {
+        'frames': run['frames'],
+        'inferences': run['inferences'],
+        'gated_skips': run['gated_skips'],
+        'fps': run['frames'] / run['elapsed'] if run['elapsed'] else 0.0,
+        'inferences_per_second': run['inferences'] / run['elapsed'] if run['elapsed'] else 0.0,
+        'frame_latency_ms': {
+            'mean': float(latencies.mean()) if len(latencies) else 0.0,
+            'p50': float(np.percentile(latencies, 50)) if len(latencies) else 0.0,
+            'p95': float(np.percentile(latencies, 95)) if len(latencies) else 0.0,
+            'p99': float(np.percentile(latencies, 99)) if len(latencies) else 0.0,
+        },
+        'stages': stages,
+    }
+
+def measure_peak_memory(path, mode, model_cost, overrides=None):
+    """Peak traced allocation in MB while running one mode"""
+    tracemalloc.start()
+    try:
+        run_mode(path, mode, model_cost, overrides)
+        return tracemalloc.get_traced_memory()[1] / 1e6
+    finally:
+        tracemalloc.stop()
+
+def environment():
+    """Describe the machine and code version the results came from"""
+    try:
+        commit = subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True,
+                                cwd=os.path.dirname(os.path.abspath(__file__))).stdout.strip()
+    except OSError:
+        commit = ''
+    return {
+        'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        'commit': commit,
+        'python': platform.python_version(),
+        'numpy': np.__version__,
+        'opencv': cv2.__version__,
+        'platform': platform.platform(),
+        'cpu_count': os.cpu_count(),
+    }
+
+def print_results(results, baseline=None):
+    print(f"{'mode':>12} {'fps':>8} {'inf/s':>7} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'peak MB':>8}")
+    for name, result in results.items():
+        latency = result['frame_latency_ms']
+        line = (f"{name:>12} {result['fps']:8.1f} {result['inferences_per_second']:7.1f} "
+                f"{latency['p50']:8.2f} {latency['p95']:8.2f} {latency['p99']:8.2f} "
+                f"{result['peak_memory_mb']:8.1f}")
+        if baseline and name in baseline:
+            old_fps = baseline[name]['fps']
+            change = (result['fps'] - old_fps) / old_fps if old_fps else 0.0
+            line += f"   fps {change:+.1%} vs baseline"
+        print(line)
+        for stage, timing in sorted(result['stages'].items()):
+            print(f"{'':>12}   {stage:<20} {timing['mean_ms']:8.3f} ms x {timing['count']}")
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--frames', type=int, default=300)
+    parser.add_argument('--width', type=int, default=1280)
+    parser.add_argument('--height', type=int, default=720)
+    parser.add_argument('--model-cost', type=float, default=0.02,
+                        help='Seconds the stub model spends per call')
+    parser.add_argument('--modes', type=int, nargs='+', choices=sorted(MODES), default=sorted(MODES))
+    parser.add_argument('--no-memory', action='store_true', help='Skip the tracemalloc pass')
+    parser.add_argument('--output', default=None, help='Write results as JSON')
+    parser.add_argument('--compare', default=None, help='JSON results of an earlier run')
+    args = parser.parse_args()
+
+    print(f"Model config: {MODEL_CONFIG_SOURCE}")
+    path = make_synthetic_video(args.frames, args.width, args.height)
+    results = {}
+    try:
+        for mode in args.modes:
+            registry.reset()
+            run = run_mode(path, mode, args.model_cost)
+            result = summarize(run, registry.snapshot())
+            result['peak_memory_mb'] = 0.0 if args.no_memory else measure_peak_memory(path, mode, args.model_cost)
+            results[MODES[mode]] = result
+    finally:
+        os.remove(path)
+
+    baseline = None
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)['results']
+    print_results(results, baseline)
+
+    if args.output:
+        report = {
+            'environment': environment(),
+            'parameters': {'frames': args.frames, 'width': args.width, 'height': args.height,
+                           'model_cost': args.model_cost, 'model_config': MODEL_CONFIG,
+                           'model_config_source': MODEL_CONFIG_SOURCE},
+            'results': results,
+        }
+        with open(args.output, 'w') as f:
+            json.dump(report, f, indent=2)
+        print(f"Wrote {args.output}")
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,464 @@
+import argparse
+import csv
+import gzip
+import multiprocessing
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from datetime import datetime
+from pathlib import Path
+
+VIDEO_EXTENSIONS = ('.mp4', '.avi', '.mkv')
+CSV_HEADER = ['source', 'start_frame', 'end_frame', 'end_time', 'class', 'confidence']
+TIME_UNITS = {'s': 1, 'm': 60, 'h': 3600, 'd': 86400, 'w': 604800}
+
+# Per-process state for analysis workers
+_worker_state = {}
+
+def find_videos(paths):
+    """Expand files and directories into a sorted list of video files"""
+    videos = []
+    for path in map(Path, paths):
+        if path.is_dir():
+            videos.extend(sorted(p for p in path.iterdir()
+                                 if p.suffix.lower() in VIDEO_EXTENSIONS))
+        elif path.is_file():
+            videos.append(path)
+        else:
+            raise FileNotFoundError(f"No such file or directory: {path}")
+    return [str(p) for p in videos]
+
+def probe_video(path):
+    """Return (frame_count, fps) of a video file"""
+    import cv2
+    cap = cv2.VideoCapture(path)
+    try:
+        if not cap.isOpened():
+            return 0, 0.0
+        return int(cap.get(cv2.CAP_PROP_FRAME_COUNT)), cap.get(cv2.CAP_PROP_FPS)
+    finally:
+        cap.release()
+
+def plan_jobs(videos, workers, segment_seconds=None):
+    """Split videos into (path, start_frame, end_frame) jobs
+
+    Long files are cut into time ranges so a few long recordings still
+    spread over all workers. Without an explicit segment length, files are
+    split just enough to give every worker something to do.
+    """
+    jobs = []
+    for path in videos:
+        frame_count, fps = probe_video(path)
+        if frame_count <= 0:
+            jobs.append((path, 0, None))
+            continue
+        if segment_seconds:
+            segment_frames = max(1, int(segment_seconds * (fps or 30.0)))
+        else:
+            segments = max(1, -(-workers // len(videos)))
+            segment_frames = -(-frame_count // segments)
+        for start in range(0, frame_count, segment_frames):
+            jobs.append((path, start, min(frame_count, start + segment_frames)))
+    return jobs
+
+def _init_worker(config_path, model_path, model_config_path, performance_mode):
+    """Load the model once per worker process"""
+    import cv2
+    # One process per core scales better than threads fighting inside each
+    cv2.setNumThreads(1)
+    try:
+        import tensorflow as tf
+        tf.config.threading.set_intra_op_parallelism_threads(1)
+        tf.config.threading.set_inter_op_parallelism_threads(1)
+    except Exception:
+        pass
+
+    from src.core.model_service import ModelService
+    from src.utils.config import ConfigManager
+
+    config_manager = ConfigManager(config_path)
+    if performance_mode is not None:
+        config_manager.config['performance_mode'] = performance_mode
+    _worker_state['config_manager'] = config_manager
+    _worker_state['model_service'] = ModelService(config_manager, model_path, model_config_path)
+
+def analyze_segment(job):
+    """Run the detection pipeline over one (path, start_frame, end_frame) job"""
+    import cv2
+    from src.core.video_service import VideoService
+    from src.utils.scheduler import InferenceScheduler
+
+    path, start_frame, end_frame = job
+    config_manager = _worker_state['config_manager']
+    model_service = _worker_state['model_service']
+
+    video_service = VideoService(config_manager, model_service.get_frame_sequence_size())
+    video_service.capture_settings = dict(video_service.capture_settings, threaded=False)
+    video_service.attach_model(model_service)
+    if not video_service.start_video_capture(path):
+        raise RuntimeError(f"Could not open video: {path}")
+
+    settings = video_service.processing_settings
+    fps = video_service.original_fps or 30.0
+    span = (model_service.sequence_length - 1) * (settings['frame_skip'] + 1)
+
+    # Start early enough that the first window ends at start_frame
+    first_frame = max(0, start_frame - span)
+    if first_frame > 0:
+        video_service.cap.set(cv2.CAP_PROP_POS_FRAMES, first_frame)
+        video_service.frame_count = first_frame
+
+    scheduler = InferenceScheduler(settings)
+    rows = []
+    try:
+        while video_service.get_frame() is not None:
+            index = video_service.frame_count - 1
+            if end_frame is not None and index >= end_frame:
+                break
+            # Schedule on video time so time budgets mean the same as live
+            video_time = index / fps
+            scheduler.frame_added()
+            sequence = video_service.get_processed_sequence()
+            if sequence is None or index < start_frame or not scheduler.should_run(video_time):
+                continue
+            predicted_class, confidence = model_service.predict_sequence(sequence)
+            scheduler.mark_run(video_time)
+            rows.append((path, max(0, index - span), index, round(video_time, 3),
+                         predicted_class, round(confidence, 4)))
+    finally:
+        video_service.release()
+    return rows
+
+def open_output(path):
+    """Open a CSV output file, gzip-compressed if the name ends in .gz"""
+    if str(path).endswith('.gz'):
+        return gzip.open(path, 'wt', newline='')
+    return open(path, 'w', newline='')
+
+def run_analyze(args):
+    """Entry point for the analyze command"""
+    videos = find_videos(args.paths)
+    if not videos:
+        print("No video files found")
+        return 1
+
+    workers = args.workers or os.cpu_count() or 1
+    jobs = plan_jobs(videos, workers, args.segment_seconds)
+    print(f"Analyzing {len(videos)} file(s) as {len(jobs)} job(s) on {workers} worker(s)")
+
+    started = time.time()
+    rows = []
+    context = multiprocessing.get_context('spawn')
+    with ProcessPoolExecutor(max_workers=workers, mp_context=context,
+                             initializer=_init_worker,
+                             initargs=(args.config, args.model, args.model_config, args.mode)) as pool:
+        futures = {pool.submit(analyze_segment, job): job for job in jobs}
+        for done, future in enumerate(as_completed(futures), 1):
+            path, start, end = futures[future]
+            try:
+                rows.extend(future.result())
+            except Exception as e:
+                print(f"Error analyzing {path} [{start}:{end}]: {str(e)}")
+                continue
+            print(f"[{done}/{len(jobs)}] {path} frames {start}-{end if end is not None else 'end'}")
+
+    rows.sort(key=lambda row: (row[0], row[2]))
+    with open_output(args.output) as f:
+        writer = csv.writer(f)
+        writer.writerow(CSV_HEADER)
+        writer.writerows(rows)
+
+    elapsed = time.time() - started
+    print(f"Wrote {len(rows)} predictions to {args.output} in {elapsed:.1f}s")
+    return 0
+
+def parse_source(source):
+    """Treat numeric sources as camera indices"""
+    return int(source) if source.isdigit() else source
+
+def open_event_store(config_manager, path=None):
+    """Create the configured EventStore, or None if it is disabled and no path is given"""
+    from src.core.event_store import EventStore
+    settings = config_manager.get_setting('event_store', {})
+    if path is None and not settings.get('enabled', False):
+        return None
+    return EventStore(path or settings.get('path', 'events.db'),
+                      settings.get('batch_size', 100), settings.get('flush_interval', 1.0))
+
+def parse_time(value, now=None):
+    """Parse a Unix timestamp, an ISO date/time, or an age such as 30m, 12h or 7d"""
+    now = time.time() if now is None else now
+    if value[-1:] in TIME_UNITS:
+        try:
+            return now - float(value[:-1]) * TIME_UNITS[value[-1]]
+        except ValueError:
+            pass
+    try:
+        return float(value)
+    except ValueError:
+        pass
+    try:
+        return datetime.fromisoformat(value).timestamp()
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"Invalid time: {value}")
+
+def run_monitor(args):
+    """Entry point for the monitor command"""
+    from src.core.model_service import ModelService
+    from src.core.multi_stream import MultiStreamEngine
+    from src.utils.config import ConfigManager
+    from src.utils.metrics import start_exporters
+
+    config_manager = ConfigManager(args.config)
+    if args.mode is not None:
+        config_manager.config['performance_mode'] = args.mode
+    threshold = config_manager.get_setting('confidence_threshold', 0.5)
+    model_service = ModelService(config_manager, args.model, args.model_config)
+    engine = MultiStreamEngine(model_service, config_manager)
+    event_store = open_event_store(config_manager)
+    if event_store is not None:
+        event_store.start()
+    exporters = start_exporters(config_manager.get_setting('metrics', {}))
+
+    alerting = {}
+    def on_result(stream_id, predicted_class, confidence, capture_time):
+        is_violence = predicted_class == "Violence" and confidence > threshold
+        if event_store is not None:
+            event_store.record(args.sources[stream_id], predicted_class, confidence, is_violence,
+                               capture_time=capture_time,
+                               latency=time.time() - capture_time if capture_time else None)
+        if is_violence != alerting.get(stream_id, False):
+            alerting[stream_id] = is_violence
+            timestamp = time.strftime('%Y-%m-%d %H:%M:%S')
+            state = 'Violence detected' if is_violence else 'Violence ended'
+            print(f"[{timestamp}] stream {stream_id}: {state} (Confidence: {confidence:.2f})")
+
+    for stream_id, source in enumerate(args.sources):
+        engine.add_stream(stream_id, parse_source(source), on_result)
+
+    engine.start()
+    started = time.time()
+    try:
+        while any(worker.is_alive() for worker in engine.streams.values()):
+            if args.duration and time.time() - started >= args.duration:
+                break
+            time.sleep(0.5)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        engine.stop()
+        if event_store is not None:
+            event_store.stop()
+        for exporter in exporters:
+            exporter.stop()
+
+    for stream_id, worker in engine.streams.items():
+        if worker.error is not None:
+            print(f"stream {stream_id}: {str(worker.error)}")
+    print(f"Scored {engine.windows_scored} windows in {engine.batches_run} batches")
+    return 0
+
+def run_query(args):
+    """Entry point for the query command"""
+    from src.utils.config import ConfigManager
+
+    config_manager = ConfigManager(args.config)
+    event_store = open_event_store(config_manager, args.db)
+    if event_store is None:
+        print("Event store is disabled, enable event_store in the config or pass --db")
+        return 1
+
+    started = time.perf_counter()
+    events = event_store.query(args.source, args.since, args.until, args.cls,
+                               args.violence, args.min_confidence, args.limit)
+    elapsed = time.perf_counter() - started
+
+    writer = csv.writer(sys.stdout)
+    writer.writerow(['time', 'source', 'class', 'confidence', 'violence',
+                     'motion_regions', 'motion_area', 'latency'])
+    for event in events:
+        writer.writerow([datetime.fromtimestamp(event.timestamp).isoformat(timespec='milliseconds'),
+                         event.source, event.predicted_class, f'{event.confidence:.3f}',
+                         event.is_violence, event.motion_regions,
+                         '' if event.motion_area is None else f'{event.motion_area:.4f}',
+                         '' if event.latency is None else f'{event.latency:.3f}'])
+    print(f"{len(events)} event(s) in {elapsed * 1000:.1f} ms", file=sys.stderr)
+    return 0
+
+def parity_batches(input_shape, samples, seed=0):
+    """Random input windows for comparing backends, one window per batch"""
+    import numpy as np
+    rng = np.random.default_rng(seed)
+    return [rng.random((1,) + tuple(input_shape[1:]), dtype=np.float32) for _ in range(samples)]
+
+def run_export(args):
+    """Entry point for the export command"""
+    from src.core.backends import KerasBackend, check_parity, create_backend, export_onnx, export_tflite
+    from src.core.model_loader import export_weights, load_model_artifact
+    from src.utils.config import ConfigManager
+
+    config_manager = ConfigManager(args.config)
+    model_settings = config_manager.get_setting('model', {})
+    model_path = args.model or model_settings.get('path', 'models/violence_detection_model.joblib')
+    keras_model = load_model_artifact(model_path)
+
+    started = time.time()
+    if args.format == 'tflite':
+        export_tflite(keras_model, args.output)
+        exported = create_backend('tflite', path=args.output)
+    elif args.format == 'onnx':
+        export_onnx(keras_model, args.output)
+        exported = create_backend('onnx', path=args.output)
+    else:
+        export_weights(keras_model, args.output)
+        exported = KerasBackend(load_model_artifact(args.output, mmap_mode='r'))
+    print(f"Exported {model_path} to {args.output} ({os.path.getsize(args.output) / 1e6:.1f} MB) "
+          f"in {time.time() - started:.1f}s")
+
+    if args.check_samples <= 0:
+        return 0
+    parity = check_parity(KerasBackend(keras_model), exported,
+                          parity_batches(keras_model.input_shape, args.check_samples), args.atol)
+    print(f"Parity on {args.check_samples} windows: max abs diff {parity['max_abs_diff']:.2e}, "
+          f"top class agreement {parity['top_class_agreement']:.1%}")
+    if not parity['within_tolerance'] or parity['top_class_agreement'] < 1.0:
+        print(f"Exported model does not match the original within {args.atol}")
+        return 1
+    return 0
+
+def load_quantization_inputs(args):
+    """Load the float model and cut preprocessed windows from the given clips"""
+    from src.core.model_loader import load_model_artifact
+    from src.core.model_service import ModelService
+    from src.core.quantization import load_calibration_windows
+    from src.utils.config import ConfigManager
+
+    config_manager = ConfigManager(args.config)
+    model_settings = config_manager.get_setting('model', {})
+    model_service = ModelService(config_manager, args.model, args.model_config, defer_load=True)
+    clips = find_videos(args.clips)
+    if not clips:
+        raise FileNotFoundError("No video files found")
+    windows = load_calibration_windows(clips, model_service, args.windows)
+    keras_model = load_model_artifact(args.model or model_settings.get('path', 'models/violence_detection_model.joblib'))
+    return model_settings, model_service, keras_model, windows
+
+def run_quantize(args):
+    """Entry point for the quantize command"""
+    from src.core.backends import export_tflite
+
+    model_settings, _, keras_model, windows = load_quantization_inputs(args)
+    if not windows:
+        print("Calibration clips are shorter than one window")
+        return 1
+    output = args.output or model_settings.get('quantized_path', 'models/violence_detection_model.int8.tflite')
+    started = time.time()
+    export_tflite(keras_model, output, representative_data=windows)
+    print(f"Wrote INT8 model to {output} ({os.path.getsize(output) / 1e6:.1f} MB), "
+          f"calibrated on {len(windows)} windows in {time.time() - started:.1f}s")
+    print("Check it on held-out clips with the accuracy-check command before enabling model.quantized")
+    return 0
+
+def run_accuracy_check(args):
+    """Entry point for the accuracy-check command"""
+    from src.core.backends import KerasBackend, create_backend
+    from src.core.quantization import agreement_report
+
+    model_settings, model_service, keras_model, windows = load_quantization_inputs(args)
+    if not windows:
+        print("Clips are shorter than one window")
+        return 1
+    quantized_path = args.quantized or model_settings.get('quantized_path',
+                                                          'models/violence_detection_model.int8.tflite')
+    quantized = create_backend('tflite', path=quantized_path, num_threads=model_settings.get('num_threads', 0))
+    report = agreement_report(KerasBackend(keras_model), quantized, windows, model_service.classes)
+
+    print(f"Agreement with the float model on {report['windows']} windows: {report['agreement']:.1%}")
+    for name, result in report['per_class'].items():
+        agreement = 'n/a' if result['agreement'] is None else f"{result['agreement']:.1%}"
+        print(f"  {name:<16} {agreement:>7} of {result['windows']} windows")
+    print(f"Score difference: max {report['max_score_diff']:.3f}, mean {report['mean_score_diff']:.3f}")
+    print(f"Latency per window: float {report['reference_ms_per_window']:.1f} ms, "
+          f"int8 {report['candidate_ms_per_window']:.1f} ms")
+    if args.output:
+        import json
+        with open(args.output, 'w') as f:
+            json.dump(report, f, indent=2)
+    if report['agreement'] < args.min_agreement:
+        print(f"Agreement is below {args.min_agreement:.0%}")
+        return 1
+    return 0
+
+def build_parser():
+    """Build the command line parser"""
+    parser = argparse.ArgumentParser(prog='python -m src.cli',
+                                     description='Headless violence detection tools')
+    parser.add_argument('--config', default='config.json', help='Path to config.json')
+    parser.add_argument('--model', default=None, help='Model file (default: model.path from the config)')
+    parser.add_argument('--model-config', default=None,
+                        help='Model config file (default: model.config_path from the config)')
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    analyze = commands.add_parser('analyze', help='Score video files offline')
+    analyze.add_argument('paths', nargs='+', help='Video files or directories of videos')
+    analyze.add_argument('-o', '--output', default='predictions.csv.gz',
+                         help='Output CSV file (.gz for compressed)')
+    analyze.add_argument('-j', '--workers', type=int, default=None,
+                         help='Worker processes (default: CPU count)')
+    analyze.add_argument('--segment-seconds', type=float, default=None,
+                         help='Split files into time ranges of this length')
+    analyze.add_argument('--mode', type=int, choices=(0, 1, 2), default=None,
+                         help='Performance mode (0: Performance, 1: Balanced, 2: Quality)')
+    analyze.set_defaults(func=run_analyze)
+
+    monitor = commands.add_parser('monitor', help='Watch several live sources with one shared model')
+    monitor.add_argument('sources', nargs='+', help='Camera indices, stream URLs or video files')
+    monitor.add_argument('--duration', type=float, default=None, help='Stop after this many seconds')
+    monitor.add_argument('--mode', type=int, choices=(0, 1, 2), default=None,
+                         help='Performance mode (0: Performance, 1: Balanced, 2: Quality)')
+    monitor.set_defaults(func=run_monitor)
+
+    query = commands.add_parser('query', help='Search recorded detection events')
+    query.add_argument('--db', default=None, help='Event database (default: event_store.path)')
+    query.add_argument('--source', default=None, help='Camera index, stream URL or video file')
+    query.add_argument('--since', type=parse_time, default=None,
+                       help='Start time: Unix time, ISO date/time, or age such as 12h or 7d')
+    query.add_argument('--until', type=parse_time, default=None, help='End time, same formats as --since')
+    query.add_argument('--class', dest='cls', default=None, help='Only events with this predicted class')
+    query.add_argument('--violence', action='store_true', help='Only events that raised an alert')
+    query.add_argument('--min-confidence', type=float, default=None)
+    query.add_argument('--limit', type=int, default=None)
+    query.set_defaults(func=run_query)
+
+    export = commands.add_parser('export', help='Convert the model for the tflite / onnx backends')
+    export.add_argument('--format', choices=('tflite', 'onnx', 'weights'), required=True,
+                        help='weights writes a memory-mappable artifact for the keras backend')
+    export.add_argument('-o', '--output', required=True, help='Output model file')
+    export.add_argument('--check-samples', type=int, default=8,
+                        help='Random windows used to check the export against the original (0 to skip)')
+    export.add_argument('--atol', type=float, default=1e-3, help='Allowed score difference')
+    export.set_defaults(func=run_export)
+
+    quantize = commands.add_parser('quantize', help='Create an INT8 TF Lite model from calibration clips')
+    quantize.add_argument('clips', nargs='+', help='Calibration video files or directories')
+    quantize.add_argument('-o', '--output', default=None, help='Output file (default: model.quantized_path)')
+    quantize.add_argument('--windows', type=int, default=200, help='Calibration windows to use')
+    quantize.set_defaults(func=run_quantize)
+
+    accuracy = commands.add_parser('accuracy-check', help='Compare the INT8 model with the float model')
+    accuracy.add_argument('clips', nargs='+', help='Held-out video files or directories')
+    accuracy.add_argument('--quantized', default=None, help='INT8 model (default: model.quantized_path)')
+    accuracy.add_argument('--windows', type=int, default=500, help='Windows to compare')
+    accuracy.add_argument('--min-agreement', type=float, default=0.95,
+                          help='Exit with an error below this top-class agreement')
+    accuracy.add_argument('-o', '--output', default=None, help='Write the report as JSON')
+    accuracy.set_defaults(func=run_accuracy_check)
+    return parser
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    return args.func(args)
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,195 @@
+import os
+import time
+
+import numpy as np
+
+BACKENDS = ('keras', 'tflite', 'onnx')
+
+class InferenceBackend:
+    """Runtime a ModelService runs its model on
+
+    Backends expose the subset of the Keras model API ModelService uses:
+    input_shape and predict(batch) returning one row of class scores per
+    window.
+    """
+    name = 'backend'
+    input_shape = None
+
+    def predict(self, batch, verbose=0):
+        raise NotImplementedError
+
+
+class KerasBackend(InferenceBackend):
+    name = 'keras'
+
+    def __init__(self, model):
+        """Run a Keras model by calling it directly
+
+        model(batch) skips the data adapter and callback machinery of
+        model.predict, which dominates the cost of small batches.
+        """
+        self.model = model
+        self.input_shape = tuple(model.input_shape)
+
+    def predict(self, batch, verbose=0):
+        return np.asarray(self.model(batch, training=False))
+
+
+class TFLiteBackend(InferenceBackend):
+    name = 'tflite'
+
+    def __init__(self, path, num_threads=None, interpreter_class=None):
+        """Run a .tflite model with the TF Lite interpreter
+
+        Quantized (int8/uint8) inputs and outputs are converted with the
+        tensor's scale and zero point, so callers always pass and get floats
+        (or the model's own input dtype if it is not quantized).
+
+        Resizing an interpreter reallocates all its tensors, so one
+        interpreter is kept per batch size seen (batched callers only use a
+        few sizes, up to their max batch size) instead of resizing one back
+        and forth. interpreter_class defaults to the TF Lite Interpreter.
+        """
+        if interpreter_class is None:
+            try:
+                from tflite_runtime.interpreter import Interpreter as interpreter_class
+            except ImportError:
+                import tensorflow as tf
+                interpreter_class = tf.lite.Interpreter
+        self.interpreter_class = interpreter_class
+        self.path = str(path)
+        self.num_threads = num_threads or None
+        self.interpreters = {}  # batch size -> (interpreter, input detail, output detail)
+        interpreter = self.interpreter_class(model_path=self.path, num_threads=self.num_threads)
+        interpreter.allocate_tensors()
+        input_detail = interpreter.get_input_details()[0]
+        self.input_shape = (None,) + tuple(int(d) for d in input_detail['shape'][1:])
+        self.interpreters[int(input_detail['shape'][0])] = (
+            interpreter, input_detail, interpreter.get_output_details()[0])
+
+    def _interpreter(self, batch_size):
+        """Return the interpreter allocated for batch_size, creating it on first use"""
+        entry = self.interpreters.get(batch_size)
+        if entry is None:
+            interpreter = self.interpreter_class(model_path=self.path, num_threads=self.num_threads)
+            index = interpreter.get_input_details()[0]['index']
+            interpreter.resize_tensor_input(index, [batch_size] + list(self.input_shape[1:]))
+            interpreter.allocate_tensors()
+            entry = (interpreter, interpreter.get_input_details()[0], interpreter.get_output_details()[0])
+            self.interpreters[batch_size] = entry
+        return entry
+
+    def predict(self, batch, verbose=0):
+        batch = np.asarray(batch)
+        interpreter, input_detail, output_detail = self._interpreter(len(batch))
+        dtype = input_detail['dtype']
+        scale, zero_point = input_detail['quantization']
+        if dtype in (np.int8, np.uint8) and scale and batch.dtype != dtype:
+            info = np.iinfo(dtype)
+            batch = np.clip(np.round(batch / scale + zero_point), info.min, info.max).astype(dtype)
+        interpreter.set_tensor(input_detail['index'], batch.astype(dtype, copy=False))
+        interpreter.invoke()
+        output = interpreter.get_tensor(output_detail['index'])
+        scale, zero_point = output_detail['quantization']
+        if output.dtype in (np.int8, np.uint8) and scale:
+            output = (output.astype(np.float32) - zero_point) * scale
+        return output
+
+
+class ONNXBackend(InferenceBackend):
+    name = 'onnx'
+
+    def __init__(self, path, num_threads=None):
+        """Run an .onnx model with ONNX Runtime on the CPU"""
+        import onnxruntime as ort
+        options = ort.SessionOptions()
+        if num_threads:
+            options.intra_op_num_threads = num_threads
+        self.session = ort.InferenceSession(str(path), options, providers=['CPUExecutionProvider'])
+        model_input = self.session.get_inputs()[0]
+        self.input_name = model_input.name
+        self.input_dtype = np.uint8 if model_input.type == 'tensor(uint8)' else np.float32
+        self.input_shape = (None,) + tuple(d if isinstance(d, int) else None for d in model_input.shape[1:])
+
+    def predict(self, batch, verbose=0):
+        batch = np.asarray(batch, dtype=self.input_dtype)
+        return self.session.run(None, {self.input_name: batch})[0]
+
+
+def create_backend(name, keras_model=None, path=None, num_threads=None):
+    """Create the named backend from a loaded Keras model or an exported file"""
+    if name == 'keras':
+        if keras_model is None:
+            raise ValueError("The keras backend needs a loaded model")
+        return KerasBackend(keras_model)
+    if name not in BACKENDS:
+        raise ValueError(f"Unknown backend: {name}")
+    if not path or not os.path.exists(path):
+        raise FileNotFoundError(f"No exported model for the {name} backend: {path}")
+    if name == 'tflite':
+        return TFLiteBackend(path, num_threads)
+    return ONNXBackend(path, num_threads)
+
+
+def export_tflite(keras_model, path, representative_data=None):
+    """Convert a Keras model to TF Lite
+
+    With representative_data (a list of input batches, e.g. from
+    quantization.load_calibration_windows), weights and activations are
+    quantized to INT8, calibrating activation ranges on those batches.
+    Ops without a builtin kernel fall back to TF Select ops.
+    """
+    import tensorflow as tf
+    converter = tf.lite.TFLiteConverter.from_keras_model(keras_model)
+    converter.target_spec.supported_ops = [tf.lite.OpsSet.TFLITE_BUILTINS, tf.lite.OpsSet.SELECT_TF_OPS]
+    if representative_data is not None:
+        converter.optimizations = [tf.lite.Optimize.DEFAULT]
+        converter.representative_dataset = lambda: ([np.asarray(batch, dtype=np.float32)]
+                                                    for batch in representative_data)
+        converter.target_spec.supported_ops = [tf.lite.OpsSet.TFLITE_BUILTINS_INT8,
+                                               tf.lite.OpsSet.SELECT_TF_OPS]
+        # TFLiteBackend quantizes inputs and dequantizes scores itself
+        converter.inference_input_type = tf.int8
+        converter.inference_output_type = tf.int8
+    # LSTM layers need unrolled tensor lists disabled to convert
+    converter._experimental_lower_tensor_list_ops = False
+    with open(path, 'wb') as f:
+        f.write(converter.convert())
+    return path
+
+
+def export_onnx(keras_model, path, opset=13):
+    """Convert a Keras model to ONNX with tf2onnx"""
+    import tensorflow as tf
+    import tf2onnx
+    spec = (tf.TensorSpec((None,) + tuple(keras_model.input_shape[1:]), tf.float32, name='input'),)
+    tf2onnx.convert.from_keras(keras_model, input_signature=spec, opset=opset, output_path=str(path))
+    return path
+
+
+def check_parity(reference, candidate, batches, atol=1e-3):
+    """Compare two backends on the same inputs
+
+    Returns max absolute difference of the scores, the fraction of windows
+    with the same top class, and whether the scores agree within atol.
+    """
+    max_diff, agree, total = 0.0, 0, 0
+    for batch in batches:
+        expected = np.asarray(reference.predict(batch), dtype=np.float32)
+        actual = np.asarray(candidate.predict(batch), dtype=np.float32)
+        max_diff = max(max_diff, float(np.abs(expected - actual).max()))
+        agree += int((expected.argmax(axis=1) == actual.argmax(axis=1)).sum())
+        total += len(batch)
+    return {'max_abs_diff': max_diff, 'top_class_agreement': agree / total if total else 1.0,
+            'within_tolerance': max_diff <= atol}
+
+
+def time_backend(backend, batch, runs=20):
+    """Return per-call latencies in seconds for repeated predictions on batch"""
+    backend.predict(batch)  # Warm-up
+    latencies = []
+    for _ in range(runs):
+        started = time.perf_counter()
+        backend.predict(batch)
+        latencies.append(time.perf_counter() - started)
+    return latencies
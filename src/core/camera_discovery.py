@@ -0,0 +1,129 @@
+import json
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, TimeoutError, as_completed
+
+import cv2
+
+def probe_camera(index, read_frame=True):
+    """Open a camera index and return its capabilities, or None if there is no device"""
+    cap = cv2.VideoCapture(index)
+    try:
+        if not cap.isOpened():
+            return None
+        # Some drivers only report the real mode after the first frame
+        readable = cap.read()[0] if read_frame else True
+        width = int(cap.get(cv2.CAP_PROP_FRAME_WIDTH))
+        height = int(cap.get(cv2.CAP_PROP_FRAME_HEIGHT))
+        fps = cap.get(cv2.CAP_PROP_FPS) or 0.0
+    finally:
+        cap.release()
+
+    label = "Default Camera" if index == 0 else f"Camera {index}"
+    name = f"{label} ({width}x{height})" if readable and width and height else label
+    return {"id": index, "name": name, "width": width, "height": height, "fps": fps}
+
+
+class CameraDiscovery:
+    def __init__(self, settings=None):
+        """Find camera devices in parallel and cache what was found
+
+        Indices 0..max_index-1 are probed on a thread pool and results are
+        reported as each probe finishes. The list is cached for ttl seconds,
+        and persisted in cache_file (not in config.json, which other threads
+        save too), so the next start can show cameras without probing.
+        """
+        settings = settings or {}
+        self.max_index = settings.get('max_index', 8)
+        self.workers = max(1, settings.get('workers', 4))
+        self.ttl = settings.get('ttl', 300.0)
+        self.timeout = settings.get('timeout', 10.0)  # Give up on devices that hang while opening
+        self.read_frame = settings.get('read_frame', True)
+        self.cache_file = settings.get('cache_file', 'camera_cache.json')
+        self.lock = threading.Lock()
+        self.cameras = None
+        self.updated = 0.0  # time.time() of the last discovery
+        self._load_cache()
+
+    def _load_cache(self):
+        """Read the camera list persisted by an earlier discovery"""
+        if not self.cache_file or not os.path.exists(self.cache_file):
+            return
+        try:
+            with open(self.cache_file, 'r') as f:
+                cached = json.load(f)
+            self.cameras = cached.get('cameras', [])
+            self.updated = cached.get('timestamp', 0.0)
+        except Exception as e:
+            print(f"Error loading camera cache: {str(e)}")
+
+    def _save_cache(self):
+        """Persist the camera list, with self.lock held"""
+        if not self.cache_file:
+            return
+        try:
+            os.makedirs(os.path.dirname(self.cache_file) or '.', exist_ok=True)
+            temp_path = self.cache_file + '.tmp'
+            with open(temp_path, 'w') as f:
+                json.dump({'timestamp': self.updated, 'cameras': self.cameras}, f, indent=4)
+            # Readers never see a partly written file
+            os.replace(temp_path, self.cache_file)
+        except Exception as e:
+            print(f"Error saving camera cache: {str(e)}")
+
+    def get_cached(self):
+        """Return the cached camera list if still fresh, otherwise None"""
+        with self.lock:
+            if self.cameras is not None and time.time() - self.updated < self.ttl:
+                return list(self.cameras)
+        return None
+
+    def discover(self, on_found=None, force=False, skip=()):
+        """Return cameras sorted by index, probing unless a fresh cache exists
+
+        on_found(camera) is called from a probe thread for every device as
+        it is found. Indices in skip (e.g. a camera that is in use) are not
+        opened; their cached entry is kept if there is one.
+        """
+        if not force:
+            cached = self.get_cached()
+            if cached is not None:
+                if on_found is not None:
+                    for camera in cached:
+                        on_found(camera)
+                return cached
+
+        with self.lock:
+            previous = {camera['id']: camera for camera in (self.cameras or [])}
+        found = [previous[index] for index in skip if index in previous]
+        for camera in found:
+            if on_found is not None:
+                on_found(camera)
+
+        executor = ThreadPoolExecutor(max_workers=self.workers)
+        futures = [executor.submit(probe_camera, index, self.read_frame)
+                   for index in range(self.max_index) if index not in skip]
+        try:
+            for future in as_completed(futures, timeout=self.timeout):
+                try:
+                    camera = future.result()
+                except Exception:
+                    continue
+                if camera is not None:
+                    found.append(camera)
+                    if on_found is not None:
+                        on_found(camera)
+        except TimeoutError:
+            print("Camera discovery timed out, some devices were not checked")
+        finally:
+            # Do not wait for probes stuck in the driver, and do not start
+            # the queued ones: they could open a camera detection is using
+            executor.shutdown(wait=False, cancel_futures=True)
+
+        found.sort(key=lambda camera: camera['id'])
+        with self.lock:
+            self.cameras = found
+            self.updated = time.time()
+            self._save_cache()
+        return list(found)
@@ -0,0 +1,118 @@
+import queue
+import threading
+import time
+from collections import namedtuple
+
+CapturedFrame = namedtuple('CapturedFrame', ['frame', 'timestamp', 'index', 'generation'])
+
+OVERFLOW_POLICIES = ('drop_oldest', 'drop_newest', 'block')
+
+class CaptureThread(threading.Thread):
+    def __init__(self, read_frame, queue_size=4, overflow_policy='drop_oldest'):
+        """Read frames on a dedicated thread into a bounded queue
+
+        read_frame is called repeatedly and must return a frame or None at
+        the end of the stream. When the queue is full the overflow policy
+        decides what happens: drop the oldest queued frame, drop the frame
+        that was just read, or block until the consumer catches up.
+        """
+        super().__init__(daemon=True)
+        if overflow_policy not in OVERFLOW_POLICIES:
+            raise ValueError(f"Unknown overflow policy: {overflow_policy}")
+        self.read_frame = read_frame
+        self.overflow_policy = overflow_policy
+        self.frames = queue.Queue(maxsize=max(1, queue_size))
+        self.stopped = threading.Event()
+        self.finished = False
+        self.dropped_frames = 0
+        self.error = None
+        self.read_lock = threading.Lock()  # Held while reading, so switch() never swaps a source mid-read
+        self.generation = 0  # Bumped by switch(); frames from older generations are discarded
+
+    def run(self):
+        """Capture loop"""
+        index = 0
+        try:
+            while not self.stopped.is_set():
+                with self.read_lock:
+                    generation = self.generation
+                    frame = self.read_frame()
+                if frame is None:
+                    break
+                self._put(CapturedFrame(frame, time.time(), index, generation))
+                index += 1
+        except Exception as e:
+            self.error = e
+        finally:
+            self.finished = True
+
+    def switch(self, change):
+        """Call change() between two reads and discard frames read before it
+
+        Used to swap the source being read without stopping the thread, so
+        a consumer waiting in get() keeps receiving frames.
+        """
+        with self.read_lock:
+            change()
+            self.generation += 1
+        while True:
+            try:
+                self.frames.get_nowait()
+            except queue.Empty:
+                break
+
+    def _put(self, item):
+        """Queue a frame according to the overflow policy"""
+        if self.overflow_policy == 'block':
+            while not self.stopped.is_set() and item.generation == self.generation:
+                try:
+                    self.frames.put(item, timeout=0.1)
+                    return
+                except queue.Full:
+                    continue
+        elif self.overflow_policy == 'drop_newest':
+            try:
+                self.frames.put_nowait(item)
+            except queue.Full:
+                self.dropped_frames += 1
+        else:
+            while True:
+                try:
+                    self.frames.put_nowait(item)
+                    return
+                except queue.Full:
+                    try:
+                        self.frames.get_nowait()
+                        self.dropped_frames += 1
+                    except queue.Empty:
+                        pass
+
+    def get(self, timeout=None):
+        """Return the next CapturedFrame, or None once the stream has ended or timeout expires"""
+        deadline = None if timeout is None else time.time() + timeout
+        while True:
+            try:
+                captured = self.frames.get(timeout=0.1)
+            except queue.Empty:
+                if self.finished:
+                    # The last frame may have been queued just before finishing
+                    try:
+                        captured = self.frames.get_nowait()
+                    except queue.Empty:
+                        return None
+                elif deadline is not None and time.time() >= deadline:
+                    return None
+                else:
+                    continue
+            if captured.generation == self.generation:
+                return captured
+
+    def ended(self):
+        """Return True once the stream has ended and every frame was consumed"""
+        return self.finished and self.frames.empty()
+
+    def stop(self, timeout=1.0):
+        """Stop capturing and wait for the thread to exit"""
+        self.stopped.set()
+        if self.is_alive():
+            self.join(timeout)
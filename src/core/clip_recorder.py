@@ -0,0 +1,154 @@
+import os
+import queue
+import re
+import threading
+import time
+from collections import deque
+
+import cv2
+import numpy as np
+
+class ClipRecorder:
+    def __init__(self, settings=None, source='source', on_saved=None):
+        """Save footage from before and after a detection
+
+        add_frame() only queues the frame; a background thread JPEG-encodes
+        it into a ring buffer holding at most pre_seconds of video and
+        max_buffer_mb of data, and writes clips, so the caller never waits
+        on encoding or disk I/O. At most queue_size raw frames wait for that
+        thread; further frames are dropped until it catches up. trigger()
+        starts a clip with the buffered frames, or extends the current one,
+        which ends post_seconds after the last trigger. on_saved(path) is
+        called from the encoder thread for each clip. Clips are named after
+        source; a change of frame size ends the current clip and empties the
+        buffer, and recording continues in a new clip at the new size.
+        """
+        settings = settings or {}
+        self.pre_seconds = settings.get('pre_seconds', 10.0)
+        self.post_seconds = settings.get('post_seconds', 10.0)
+        self.jpeg_quality = settings.get('jpeg_quality', 80)
+        self.max_buffer_bytes = int(settings.get('max_buffer_mb', 64) * 1024 * 1024)
+        self.output_dir = settings.get('output_dir', 'clips')
+        self.codec = settings.get('codec', 'mp4v')
+        self.extension = settings.get('extension', '.mp4')
+        self.default_fps = settings.get('fps', 15.0)  # Used until the capture rate is known
+        self.source_label = re.sub(r'[^\w.-]+', '_', os.path.splitext(os.path.basename(str(source)))[0]) or 'source'
+        self.on_saved = on_saved
+
+        self.frames = deque()  # (timestamp, jpeg bytes), only touched by the encoder thread
+        self.buffer_bytes = 0
+        self.frame_size = None  # (height, width) of the buffered frames
+        self.lock = threading.Lock()
+        self.recording_until = None  # Capture time the current clip ends at
+        self.dropped_frames = 0  # Frames dropped because the encoder fell behind
+        self.pending = queue.Queue(maxsize=max(1, settings.get('queue_size', 8)))
+        self.thread = threading.Thread(target=self._run, daemon=True)
+        self.thread.start()
+
+    def add_frame(self, frame, timestamp):
+        """Queue a BGR frame for the encoder thread
+
+        The frame must not be modified afterwards; capture frames never are.
+        """
+        try:
+            self.pending.put_nowait((frame, timestamp))
+        except queue.Full:
+            self.dropped_frames += 1
+
+    def trigger(self, timestamp=None):
+        """Start a clip with the buffered frames, or extend the current one"""
+        timestamp = time.time() if timestamp is None else timestamp
+        with self.lock:
+            if self.recording_until is None or self.recording_until < timestamp + self.post_seconds:
+                self.recording_until = timestamp + self.post_seconds
+
+    def is_recording(self):
+        return self.recording_until is not None
+
+    def _estimate_fps(self):
+        """Frame rate of the buffered frames, so clips play back in real time"""
+        if len(self.frames) < 2:
+            return self.default_fps
+        span = self.frames[-1][0] - self.frames[0][0]
+        return (len(self.frames) - 1) / span if span > 0 else self.default_fps
+
+    def stop(self):
+        """Finish the current clip and stop the encoder thread"""
+        self.pending.put(None)
+        self.thread.join(timeout=10.0)
+        with self.lock:
+            self.recording_until = None
+
+    def _run(self):
+        """Encoder loop"""
+        writer, path = None, None
+        while True:
+            item = self.pending.get()
+            try:
+                if item is None:
+                    break
+                frame, timestamp = item
+                if frame.shape[:2] != self.frame_size:
+                    # Neither the open writer nor the buffered frames fit this size
+                    if writer is not None:
+                        writer = self._finish(writer, path)
+                    self.frames.clear()
+                    self.buffer_bytes = 0
+                    self.frame_size = frame.shape[:2]
+                with self.lock:
+                    until = self.recording_until
+                if writer is None and until is not None and self.frames:
+                    name = f"clip_{self.source_label}_{time.strftime('%Y%m%d_%H%M%S', time.localtime(timestamp))}"
+                    path = os.path.join(self.output_dir, name + self.extension)
+                    writer = self._open_writer(path, self._estimate_fps(), frame)
+                    for _, data in self.frames:
+                        writer.write(self._decode(data))
+                if writer is not None:
+                    if until is not None and timestamp <= until:
+                        writer.write(frame)
+                    else:
+                        writer = self._finish(writer, path)
+                        with self.lock:
+                            # Unless trigger() extended the clip meanwhile
+                            if self.recording_until == until:
+                                self.recording_until = None
+                self._buffer(frame, timestamp)
+            except Exception as e:
+                print(f"Error recording clip {path}: {str(e)}")
+                if writer is not None:
+                    writer.release()
+                writer = None
+        if writer is not None:
+            self._finish(writer, path)
+        self.frames.clear()
+        self.buffer_bytes = 0
+
+    def _buffer(self, frame, timestamp):
+        """JPEG-encode a frame into the pre-event ring buffer"""
+        ok, encoded = cv2.imencode('.jpg', frame, [cv2.IMWRITE_JPEG_QUALITY, self.jpeg_quality])
+        if not ok:
+            return
+        data = encoded.tobytes()
+        self.frames.append((timestamp, data))
+        self.buffer_bytes += len(data)
+        while self.frames and (timestamp - self.frames[0][0] > self.pre_seconds or
+                               self.buffer_bytes > self.max_buffer_bytes):
+            self.buffer_bytes -= len(self.frames.popleft()[1])
+
+    def _finish(self, writer, path):
+        writer.release()
+        if self.on_saved is not None:
+            self.on_saved(path)
+        return None
+
+    def _open_writer(self, path, fps, first_frame):
+        os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+        height, width = first_frame.shape[:2]
+        writer = cv2.VideoWriter(path, cv2.VideoWriter_fourcc(*self.codec), fps, (width, height))
+        if not writer.isOpened():
+            raise RuntimeError(f"Could not open video writer for {path}")
+        return writer
+
+    @staticmethod
+    def _decode(data):
+        return cv2.imdecode(np.frombuffer(data, np.uint8), cv2.IMREAD_COLOR)
@@ -0,0 +1,254 @@
+import time
+
+import cv2
+
+from src.core.clip_recorder import ClipRecorder
+from src.core.roi import RegionTracker
+from src.core.stages import (DisplayStage, DrawStage, FrameContext, MotionStage, RegionStage, ResizeStage,
+                             build_pipeline, create_motion_detector)
+from src.utils.metrics import registry
+from src.utils.scheduler import InferenceScheduler, MotionGate
+
+class DetectionLoop:
+    def __init__(self, video_service, model_service, event_store=None, on_error=None, on_clip_saved=None):
+        """Per-frame detection logic shared by DetectionWorker and the benchmarks
+
+        process_frame() runs the analysis stages, scheduled and motion-gated
+        inference, violence persistence and manual triggers, clip recording
+        and, when should_render() allows it, the render stages. It has no Qt
+        dependency; callers fetch frames and deliver the results. on_error
+        gets prediction errors, which are raised if it is None.
+        """
+        self.video_service = video_service
+        self.model_service = model_service
+        self.event_store = event_store  # Optional EventStore for per-window predictions
+        self.on_error = on_error
+        self.on_clip_saved = on_clip_saved
+        if self.video_service.frame_buffer is None:
+            self.video_service.attach_model(self.model_service)
+        self.is_violence = False
+        self.show_boxes = True
+        self.violence_persist_time = None
+        self.VIOLENCE_PERSISTENCE = 3  # 3 seconds persistence
+        self.manual_violence_trigger = False
+        self.predicted_class = "NonViolence"  # Last prediction, valid until the next run
+        self.confidence = 0.0
+        self.scheduler = InferenceScheduler(self.video_service.processing_settings)
+        self.motion_gate = MotionGate(self.video_service.config_manager.get_setting('motion_gate', {}),
+                                      self.model_service.get_frame_sequence_size())
+        self.roi_settings = self.video_service.config_manager.get_setting('roi', {})
+        self.region_tracker = RegionTracker(
+            self.model_service.get_frame_sequence_size(), self.roi_settings,
+            self.model_service.image_width / self.model_service.image_height)
+        self.build_pipelines()
+        self.clip_recorder = None
+        self.build_clip_recorder()
+        self.capture_rate = registry.rate('processed_fps', help_text='Frames analyzed by the detection worker per second')
+        self.inference_rate = registry.rate('inference_fps', help_text='Model predictions per second')
+        self.display_rate = registry.rate('displayed_fps', help_text='Frames sent to the display per second')
+        self.latency = registry.histogram('latency_seconds', help_text='Capture to prediction latency')
+        registry.gauge('dropped_frames', lambda: self.video_service.dropped_frames,
+                       'Frames dropped by the capture queue')
+        registry.gauge('clip_dropped_frames',
+                       lambda: self.clip_recorder.dropped_frames if self.clip_recorder is not None else 0,
+                       'Frames the clip recorder dropped because its encoder fell behind')
+        registry.gauge('gated_skips', lambda: self.motion_gate.skipped,
+                       'Model runs skipped because the scene was still')
+        self.last_latency = 0.0  # Capture-to-prediction latency of the last run
+        display_settings = self.video_service.config_manager.get_setting('display', {})
+        max_fps = display_settings.get('max_fps', 30)
+        self.display_interval = 1.0 / max_fps if max_fps > 0 else 0.0
+        self.display_size = None  # (width, height) of the video widget
+        self.display_pending = False  # A frame was emitted and not yet shown
+        self.last_display_time = 0.0
+
+    def build_pipelines(self):
+        """Compose the per-frame stages for the current source from config
+
+        source_changed() calls this again, so per-source motion and
+        pipeline overrides follow switch_source().
+        """
+        config_manager = self.video_service.config_manager
+        source = self.video_service.current_source
+        self.pipeline_source = source
+        motion_settings = config_manager.get_source_setting('motion', source, {})
+        pipeline_settings = config_manager.get_source_setting('pipeline', source, {})
+        factories = {
+            'resize': lambda: ResizeStage(lambda: self.video_service.processing_settings['resize_factor']),
+            'motion': lambda: MotionStage(create_motion_detector(motion_settings)),
+            'roi': lambda: RegionStage(self.region_tracker),
+            'display': lambda: DisplayStage(lambda: self.display_size),
+            'draw': DrawStage,
+        }
+        # Analysis stages run before inference, render stages after it
+        self.analysis_pipeline = build_pipeline(
+            pipeline_settings.get('analysis', ['resize', 'motion', 'roi']), factories, registry)
+        self.render_pipeline = build_pipeline(pipeline_settings.get('render', ['display', 'draw']),
+                                              factories, registry)
+
+    def build_clip_recorder(self):
+        """Start a clip recorder for the current source if it has recording enabled
+
+        A recorder for the previous source is stopped first, which finishes
+        its clip, so clips never mix sources and are named after their own.
+        """
+        if self.clip_recorder is not None:
+            self.clip_recorder.stop()
+            self.clip_recorder = None
+        source = self.video_service.current_source
+        clip_settings = self.video_service.config_manager.get_source_setting('clip_recording', source, {})
+        if clip_settings.get('enabled', False):
+            self.clip_recorder = ClipRecorder(clip_settings, source, self.on_clip_saved)
+
+    def source_changed(self):
+        """Rebuild the stages for a new source and forget the previous source's state"""
+        self.build_pipelines()
+        self.scheduler.reset()
+        self.motion_gate.reset()
+        self.region_tracker.clear()
+        self.build_clip_recorder()
+
+    def set_display_size(self, width, height):
+        """Set the size frames are scaled to before being emitted"""
+        self.display_size = (width, height)
+
+    def frame_displayed(self):
+        """Called once the last rendered frame is shown"""
+        self.display_pending = False
+
+    def should_render(self, current_time):
+        """Return True if a frame should be rendered and emitted now
+
+        Frames are skipped while the GUI has not shown the previous one, so
+        a slow GUI thread never builds up a backlog of stale frames, and the
+        display rate is capped at display.max_fps.
+        """
+        if self.display_pending:
+            return False
+        return current_time - self.last_display_time >= self.display_interval
+
+    def trigger_manual_violence(self):
+        """Manually trigger violence detection"""
+        self.is_violence = True
+        self.manual_violence_trigger = True
+        self.violence_persist_time = time.time()
+
+    def trigger_manual_nonviolence(self):
+        self.is_violence = False
+        self.manual_violence_trigger = False
+        self.violence_persist_time = time.time()  # Used to keep nonviolence state for 1 second
+
+    def predict(self, processed_frames, frame_shape):
+        """Score the current window, cropped to motion regions in ROI mode"""
+        if self.roi_settings.get('enabled', False):
+            regions = self.region_tracker.get_regions(
+                frame_shape, self.roi_settings.get('multi_region', False))
+            raw_frames = self.video_service.get_frame_sequence()
+            if regions and raw_frames is not None:
+                return self.model_service.predict_regions(raw_frames, regions)
+        # No motion to crop to, use the cached full-frame window
+        return self.model_service.predict_sequence(processed_frames)
+
+    def record_prediction(self, predicted_class, confidence, context):
+        """Queue a model prediction and the frame's motion stats in the event store"""
+        if self.event_store is None:
+            return
+        h, w = context.display_frame.shape[:2]
+        motion_area = sum(bw * bh for _, _, bw, bh in context.motion_regions) / float(w * h)
+        self.event_store.record(self.video_service.current_source, predicted_class, confidence,
+                                self.is_violence, context.timestamp,
+                                self.video_service.last_capture_time, len(context.motion_regions),
+                                motion_area, self.last_latency)
+
+    def update_violence_state(self, predicted_class, confidence, current_time):
+        """Update violence state and persistence from a new prediction"""
+        if predicted_class == "Violence" and confidence > 0.5:
+            self.is_violence = True
+            self.violence_persist_time = current_time
+        elif not self.violence_persist_time or (
+            current_time - self.violence_persist_time >= self.VIOLENCE_PERSISTENCE):
+            self.is_violence = False
+            self.manual_violence_trigger = False
+
+    def process_frame(self, frame, current_time):
+        """Analyze, score and render one capture frame
+
+        Returns the frame's context, with context.rendered set if the render
+        stages ran (context.display_frame is then RGB), or None if the
+        prediction failed and the frame was dropped.
+        """
+        if self.video_service.current_source != self.pipeline_source:
+            self.source_changed()
+
+        self.capture_rate.tick(current_time)
+        if self.clip_recorder is not None:
+            self.clip_recorder.add_frame(frame, self.video_service.last_capture_time or current_time)
+        # Pick up performance mode changes
+        self.scheduler.configure(self.video_service.processing_settings)
+        self.scheduler.frame_added()
+
+        # Per-frame analysis (display scaling, motion, ROI tracking)
+        context = FrameContext(frame, current_time)
+        self.analysis_pipeline.process(context)
+        self.motion_gate.update(context.motion_regions, context.display_frame.shape)
+
+        # Check for manual triggers and persistence
+        if self.manual_violence_trigger or (
+            self.violence_persist_time and
+            current_time - self.violence_persist_time < (
+                3 if self.is_violence else 1  # 3 seconds for violence, 1 for nonviolence
+            )
+        ):
+            self.predicted_class = "Violence" if self.is_violence else "NonViolence"
+            self.confidence = 1.0
+        else:
+            # Run detection if we have enough frames and a run is due,
+            # otherwise the last prediction stays valid
+            frames = self.video_service.get_processed_sequence()
+            if frames is not None and self.scheduler.should_run(current_time):
+                if not self.motion_gate.is_open():
+                    # Still scene, the model is not run
+                    self.scheduler.mark_run(current_time)
+                    self.motion_gate.skip()
+                    self.predicted_class, self.confidence = "NonViolence", 0.0
+                    self.update_violence_state(self.predicted_class, self.confidence, current_time)
+                else:
+                    try:
+                        self.predicted_class, self.confidence = self.predict(frames, frame.shape)
+                    except Exception as e:
+                        if self.on_error is None:
+                            raise
+                        self.on_error(f"Detection error: {str(e)}")
+                        return None
+                    self.scheduler.mark_run(current_time)
+                    self.inference_rate.tick(current_time)
+                    if self.video_service.last_capture_time is not None:
+                        self.last_latency = time.time() - self.video_service.last_capture_time
+                        self.latency.observe(self.last_latency)
+                    self.update_violence_state(self.predicted_class, self.confidence, current_time)
+                    self.record_prediction(self.predicted_class, self.confidence, context)
+
+        if self.clip_recorder is not None and self.is_violence:
+            # Keeps extending the clip while the incident lasts
+            self.clip_recorder.trigger(current_time)
+
+        # Scaling, color conversion and drawing happen here rather than
+        # on the GUI thread, and only for frames that are shown
+        if self.should_render(current_time):
+            context.is_violence = self.is_violence
+            context.show_boxes = self.show_boxes
+            self.render_pipeline.process(context)
+            self.display_pending = True
+            self.last_display_time = current_time
+            self.display_rate.tick(current_time)
+            if not context.rgb:
+                # Render pipeline without a display stage
+                context.display_frame = cv2.cvtColor(context.display_frame, cv2.COLOR_BGR2RGB)
+                context.rgb = True
+            context.rendered = True
+        return context
+
+    def stop(self):
+        """Finish the current clip"""
+        if self.clip_recorder is not None:
+            self.clip_recorder.stop()
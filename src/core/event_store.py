@@ -0,0 +1,158 @@
+import queue
+import sqlite3
+import threading
+import time
+from collections import namedtuple
+
+EVENT_COLUMNS = ('source', 'timestamp', 'capture_time', 'predicted_class', 'confidence',
+                 'is_violence', 'motion_regions', 'motion_area', 'latency')
+
+Event = namedtuple('Event', ('id',) + EVENT_COLUMNS)
+
+SCHEMA = '''
+CREATE TABLE IF NOT EXISTS events (
+    id INTEGER PRIMARY KEY,
+    source TEXT NOT NULL,
+    timestamp REAL NOT NULL,
+    capture_time REAL,
+    predicted_class TEXT NOT NULL,
+    confidence REAL NOT NULL,
+    is_violence INTEGER NOT NULL,
+    motion_regions INTEGER,
+    motion_area REAL,
+    latency REAL
+);
+CREATE INDEX IF NOT EXISTS events_source_time ON events (source, timestamp);
+CREATE INDEX IF NOT EXISTS events_time ON events (timestamp);
+'''
+
+class EventStore:
+    def __init__(self, path, batch_size=100, flush_interval=1.0):
+        """Append-only SQLite store of per-window predictions
+
+        record() only queues the event; a background thread writes queued
+        events in one transaction per batch of up to batch_size events or
+        every flush_interval seconds, so the detection thread never waits
+        on disk I/O. Queries use their own connection and see every event
+        written so far.
+        """
+        self.path = str(path)
+        self.batch_size = max(1, batch_size)
+        self.flush_interval = flush_interval
+        self.events = queue.Queue()
+        self.written = 0
+        self.running = False
+        self.thread = None
+
+        connection = self._connect()
+        try:
+            connection.executescript(SCHEMA)
+        finally:
+            connection.close()
+
+    def _connect(self):
+        connection = sqlite3.connect(self.path, timeout=10.0)
+        # WAL lets queries run while the writer thread commits
+        connection.execute('PRAGMA journal_mode=WAL')
+        connection.execute('PRAGMA synchronous=NORMAL')
+        return connection
+
+    def start(self):
+        """Start the writer thread"""
+        if self.running:
+            return
+        self.running = True
+        self.thread = threading.Thread(target=self._run, daemon=True)
+        self.thread.start()
+
+    def stop(self):
+        """Write everything still queued and stop the writer thread"""
+        self.running = False
+        if self.thread is not None:
+            self.thread.join(timeout=5.0)
+            self.thread = None
+
+    def record(self, source, predicted_class, confidence, is_violence, timestamp=None,
+               capture_time=None, motion_regions=None, motion_area=None, latency=None):
+        """Queue one prediction for writing"""
+        timestamp = time.time() if timestamp is None else timestamp
+        self.events.put((str(source), timestamp, capture_time, predicted_class, float(confidence),
+                         int(bool(is_violence)), motion_regions, motion_area, latency))
+
+    def _take_batch(self, timeout):
+        try:
+            batch = [self.events.get(timeout=timeout)]
+        except queue.Empty:
+            return []
+        while len(batch) < self.batch_size:
+            try:
+                batch.append(self.events.get_nowait())
+            except queue.Empty:
+                break
+        return batch
+
+    def _run(self):
+        """Writer loop"""
+        connection = self._connect()
+        insert = f"INSERT INTO events ({', '.join(EVENT_COLUMNS)}) VALUES ({', '.join('?' * len(EVENT_COLUMNS))})"
+        try:
+            while self.running or not self.events.empty():
+                batch = self._take_batch(self.flush_interval if self.running else 0)
+                if not batch:
+                    continue
+                try:
+                    with connection:
+                        connection.executemany(insert, batch)
+                    self.written += len(batch)
+                except sqlite3.Error as e:
+                    print(f"Error writing events: {str(e)}")
+        finally:
+            connection.close()
+
+    def query(self, source=None, start=None, end=None, predicted_class=None,
+              violence_only=False, min_confidence=None, limit=None):
+        """Return events matching all given filters, oldest first
+
+        start and end are Unix timestamps; the (source, timestamp) index
+        makes per-source time range queries fast.
+        """
+        conditions, params = [], []
+        if source is not None:
+            conditions.append('source = ?')
+            params.append(str(source))
+        if start is not None:
+            conditions.append('timestamp >= ?')
+            params.append(start)
+        if end is not None:
+            conditions.append('timestamp < ?')
+            params.append(end)
+        if predicted_class is not None:
+            conditions.append('predicted_class = ?')
+            params.append(predicted_class)
+        if violence_only:
+            conditions.append('is_violence = 1')
+        if min_confidence is not None:
+            conditions.append('confidence >= ?')
+            params.append(min_confidence)
+
+        sql = f"SELECT id, {', '.join(EVENT_COLUMNS)} FROM events"
+        if conditions:
+            sql += ' WHERE ' + ' AND '.join(conditions)
+        sql += ' ORDER BY timestamp'
+        if limit is not None:
+            sql += ' LIMIT ?'
+            params.append(int(limit))
+
+        connection = self._connect()
+        try:
+            return [Event(*row) for row in connection.execute(sql, params)]
+        finally:
+            connection.close()
+
+    def sources(self):
+        """Return the distinct sources with recorded events"""
+        connection = self._connect()
+        try:
+            return [row[0] for row in connection.execute('SELECT DISTINCT source FROM events ORDER BY source')]
+        finally:
+            connection.close()
@@ -0,0 +1,50 @@
+import numpy as np
+
+class FrameBuffer:
+    def __init__(self, sequence_length, frame_shape, dtype=np.float32):
+        """Initialize a ring buffer of preprocessed frames
+
+        The storage is preallocated once with room for two copies of the
+        window. Every frame is written to slot ``i`` and mirrored to slot
+        ``i + sequence_length`` so the last ``sequence_length`` frames are
+        always contiguous and in capture order, which lets the model input
+        be a view instead of a freshly stacked array.
+        """
+        self.sequence_length = sequence_length
+        self.frame_shape = tuple(frame_shape)
+        self.buffer = np.zeros((2 * sequence_length,) + self.frame_shape, dtype=dtype)
+        self.index = 0
+        self.count = 0
+
+    def append(self, frame):
+        """Store an already preprocessed frame"""
+        self.next_slot()[...] = frame
+        self.commit()
+
+    def next_slot(self):
+        """Return the slot the next frame should be written into"""
+        return self.buffer[self.index]
+
+    def commit(self):
+        """Publish the frame written into next_slot()"""
+        self.buffer[self.index + self.sequence_length] = self.buffer[self.index]
+        self.index = (self.index + 1) % self.sequence_length
+        self.count = min(self.count + 1, self.sequence_length)
+
+    def is_full(self):
+        """Return True once a complete window is buffered"""
+        return self.count == self.sequence_length
+
+    def get_sequence(self):
+        """Return the current window as a view, oldest frame first"""
+        if not self.is_full():
+            return None
+        return self.buffer[self.index:self.index + self.sequence_length]
+
+    def clear(self):
+        """Drop all buffered frames without releasing the storage"""
+        self.index = 0
+        self.count = 0
+
+    def __len__(self):
+        return self.count
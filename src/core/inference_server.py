@@ -0,0 +1,109 @@
+import queue
+import threading
+import time
+from concurrent.futures import Future
+
+from src.utils.metrics import Histogram
+
+BATCH_SIZE_BUCKETS = (1, 2, 4, 8, 16, 32, 64)
+QUEUE_WAIT_BUCKETS = (0.001, 0.002, 0.005, 0.01, 0.02, 0.05, 0.1, 0.25, 0.5, 1.0)
+
+class InferenceServer:
+    def __init__(self, model_service, max_batch_size=8, max_wait_ms=10):
+        """Collect pending windows into micro-batches for ModelService
+
+        A batch is sent to the model as soon as it holds max_batch_size
+        windows or the oldest window has waited max_wait_ms, whichever
+        comes first. Callers get a Future resolving to (class, confidence)
+        and must not modify the submitted array until it resolves.
+        """
+        self.model_service = model_service
+        self.max_batch_size = max(1, max_batch_size)
+        self.max_wait = max_wait_ms / 1000.0
+        self.requests = queue.Queue()
+        self.batch_sizes = Histogram(BATCH_SIZE_BUCKETS)
+        self.queue_wait = Histogram(QUEUE_WAIT_BUCKETS)  # Seconds from submit to model call
+        self.running = False
+        self.lock = threading.Lock()  # Orders submit() against stop()
+        self.thread = None
+
+    def start(self):
+        """Start the batching thread"""
+        if self.running:
+            return
+        self.running = True
+        self.thread = threading.Thread(target=self._run, daemon=True)
+        self.thread.start()
+
+    def stop(self):
+        """Stop the batching thread and fail requests still queued"""
+        with self.lock:
+            # No submit() can queue a request after this
+            self.running = False
+        if self.thread is not None:
+            self.thread.join(timeout=2.0)
+            self.thread = None
+        with self.lock:
+            while True:
+                try:
+                    _, future, _ = self.requests.get_nowait()
+                except queue.Empty:
+                    break
+                future.set_exception(RuntimeError("Inference server stopped"))
+
+    def submit(self, sequence):
+        """Queue a preprocessed window and return a Future for its prediction"""
+        future = Future()
+        with self.lock:
+            if not self.running:
+                raise RuntimeError("Inference server is not running")
+            self.requests.put((sequence, future, time.time()))
+        return future
+
+    def _collect_batch(self):
+        """Wait for the first request, then fill the batch until full or timed out"""
+        try:
+            first = self.requests.get(timeout=0.1)
+        except queue.Empty:
+            return []
+        batch = [first]
+        deadline = first[2] + self.max_wait
+        while len(batch) < self.max_batch_size:
+            remaining = deadline - time.time()
+            try:
+                if remaining > 0:
+                    batch.append(self.requests.get(timeout=remaining))
+                else:
+                    # Deadline passed, but take whatever is already queued
+                    batch.append(self.requests.get_nowait())
+            except queue.Empty:
+                break
+        return batch
+
+    def _run(self):
+        """Batching loop"""
+        while self.running:
+            batch = self._collect_batch()
+            if not batch:
+                continue
+
+            started = time.time()
+            for _, _, submitted in batch:
+                self.queue_wait.observe(started - submitted)
+            self.batch_sizes.observe(len(batch))
+
+            try:
+                results = self.model_service.predict_batch([item[0] for item in batch])
+            except Exception as e:
+                for _, future, _ in batch:
+                    future.set_exception(e)
+                continue
+            for (_, future, _), result in zip(batch, results):
+                future.set_result(result)
+
+    def stats(self):
+        """Return batch-size and queue-wait histograms"""
+        return {
+            'batch_size': self.batch_sizes.snapshot(),
+            'queue_wait_seconds': self.queue_wait.snapshot(),
+        }
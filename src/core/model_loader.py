@@ -0,0 +1,96 @@
+import json
+import os
+from pathlib import Path
+
+# Format of the weights artifact written by export_weights
+WEIGHTS_FORMAT = 'keras-weights-v1'
+
+def detect_format(path):
+    """Return the artifact format of a model path"""
+    path = Path(path)
+    if path.is_dir():
+        if (path / 'saved_model.pb').exists():
+            return 'saved_model'
+        raise ValueError(f"Directory is not a SavedModel: {path}")
+    suffix = path.suffix.lower()
+    if suffix in ('.keras', '.h5', '.hdf5'):
+        return 'keras'
+    if suffix in ('.joblib', '.pkl', '.pickle'):
+        return 'joblib'
+    raise ValueError(f"Unknown model format: {path}")
+
+def load_model_artifact(path, mmap_mode=None):
+    """Load a model from a joblib pickle, a weights artifact, a .keras/.h5 file or a SavedModel
+
+    mmap_mode is passed to joblib.load. Arrays stored uncompressed (as in
+    artifacts written by export_weights) are then memory-mapped instead of
+    read into a private buffer, which lowers peak memory while loading.
+    Keras still copies the weights into its own variables, so every process
+    keeps a private copy; pickled Keras models are not affected at all.
+    Processes that should share one copy of the weights can use the tflite
+    backend, whose interpreter maps the model file.
+    """
+    if not os.path.exists(path):
+        raise FileNotFoundError(f"No such model file: {path}")
+    model_format = detect_format(path)
+    if model_format == 'joblib':
+        import joblib
+        artifact = joblib.load(path, mmap_mode=mmap_mode)
+        if isinstance(artifact, dict) and artifact.get('format') == WEIGHTS_FORMAT:
+            return _build_from_weights(artifact)
+        return artifact
+
+    import tensorflow as tf
+    if model_format == 'keras':
+        return tf.keras.models.load_model(path, compile=False)
+    try:
+        return tf.keras.models.load_model(path, compile=False)
+    except (ValueError, OSError):
+        # Not written by Keras, serve the inference signature instead
+        return SavedModelWrapper(tf.saved_model.load(str(path)))
+
+def _build_from_weights(artifact):
+    """Rebuild a Keras model from its architecture and weight arrays"""
+    import tensorflow as tf
+    model = tf.keras.models.model_from_json(artifact['architecture'])
+    model.set_weights(artifact['weights'])
+    return model
+
+def export_weights(model, path):
+    """Write a Keras model as architecture JSON plus uncompressed weight arrays
+
+    The result loads with load_model_artifact(path, mmap_mode='r') without
+    reading the arrays into a temporary buffer first.
+    """
+    import joblib
+    artifact = {
+        'format': WEIGHTS_FORMAT,
+        'architecture': model.to_json(),
+        'weights': model.get_weights(),
+    }
+    # No compression, so the arrays can be memory-mapped on load
+    joblib.dump(artifact, path, compress=0)
+    return path
+
+def load_model_config(path):
+    """Load the model config dict from a joblib or JSON file"""
+    if str(path).lower().endswith('.json'):
+        with open(path, 'r') as f:
+            return json.load(f)
+    import joblib
+    return joblib.load(path)
+
+
+class SavedModelWrapper:
+    def __init__(self, loaded):
+        """Give a plain SavedModel the predict() interface of a Keras model"""
+        self.function = loaded.signatures['serving_default']
+        spec = list(self.function.structured_input_signature[1].values())[0]
+        self.input_name = list(self.function.structured_input_signature[1])[0]
+        self.input_shape = tuple(spec.shape.as_list())
+        self.input_dtype = spec.dtype
+
+    def predict(self, batch, verbose=0):
+        import tensorflow as tf
+        outputs = self.function(**{self.input_name: tf.convert_to_tensor(batch, dtype=self.input_dtype)})
+        return next(iter(outputs.values())).numpy()
@@ -1,16 +1,63 @@
+import time
 import cv2
+import threading
 import numpy as np
-import joblib
+from concurrent.futures import TimeoutError as FutureTimeoutError
 from pathlib import Path
+from src.core.frame_buffer import FrameBuffer
+from src.core.backends import KerasBackend, create_backend
+from src.core.inference_server import InferenceServer
+from src.core.model_loader import load_model_artifact, load_model_config
+from src.utils.metrics import Timer, registry
+
+INTERPOLATIONS = {
+    'nearest': cv2.INTER_NEAREST,
+    'linear': cv2.INTER_LINEAR,
+    'area': cv2.INTER_AREA,
+}
+
+# Scale factor for uint8 pixels, kept float32 so no float64 intermediates appear
+PIXEL_SCALE = np.float32(1.0 / 255.0)
 
 class ModelService:
-    def __init__(self, config_manager, model_path='models/violence_detection_model.joblib', 
-                 config_path='models/model_config.joblib'):
-        """Initialize the model service"""
+    def __init__(self, config_manager, model_path=None, config_path=None, model=None, model_config=None,
+                 defer_load=False):
+        """Initialize the model service
+
+        Paths default to model.path / model.config_path from the config.
+        An already loaded model and config dict can be passed instead of
+        paths, e.g. for benchmarks with a stand-in model. With defer_load
+        only the small model config is read here and the model itself is
+        loaded by load_model(), e.g. on a background thread at startup.
+        """
         self.config_manager = config_manager
+        model_settings = self.config_manager.get_setting('model', {})
+        self.model_path = model_path or model_settings.get('path', 'models/violence_detection_model.joblib')
+        config_path = config_path or model_settings.get('config_path', 'models/model_config.joblib')
+        self.mmap_mode = model_settings.get('mmap_mode')
+        self.warmup_runs = model_settings.get('warmup_runs', 1)
+        self.warmup_batch_sizes = model_settings.get('warmup_batch_sizes', [1])
+        self.backend = model_settings.get('backend', 'keras')  # keras, tflite or onnx
+        self.backend_path = model_settings.get('backend_path')  # Exported model for tflite / onnx
+        self.num_threads = model_settings.get('num_threads', 0)  # 0 lets the runtime decide
+        if model_settings.get('quantized', False):
+            # INT8 model written by `python -m src.cli quantize`
+            self.backend = 'tflite'
+            self.backend_path = model_settings.get('quantized_path',
+                                                   'models/violence_detection_model.int8.tflite')
+        self.model = model
+        self.loaded = False
+        self.load_lock = threading.Lock()
+        self.inference_server = None
+        self.inference_timeout = 5.0  # Seconds predict_sequence waits for the inference server
+        self._region_batch = None  # Reused batch for predict_regions
+        self.preprocess_time = registry.histogram('preprocess_seconds', help_text='Time to preprocess one frame')
+        self.predict_time = registry.histogram('predict_seconds', help_text='Time of one model call')
+        self.windows_inferred = registry.counter('windows_inferred_total', 'Windows scored by the model')
         try:
-            self.model = joblib.load(model_path)
-            self.config = joblib.load(config_path)
+            if model_config is None:
+                model_config = load_model_config(config_path)
+            self.config = model_config
             self.sequence_length = self.config['SEQUENCE_LENGTH']
             self.image_height = self.config['IMAGE_HEIGHT']
             self.image_width = self.config['IMAGE_WIDTH']
@@ -19,27 +66,124 @@ class ModelService:
         except Exception as e:
             raise RuntimeError(f"Failed to load model: {str(e)}")
 
+        self.normalize_in_model = False
+        self.input_dtype = np.float32
+        # INTER_LINEAR matches cv2.resize's default used in training and only
+        # samples the output pixels; INTER_AREA anti-aliases but reads the
+        # whole capture frame, which costs several ms on 1080p input
+        self.interpolation = INTERPOLATIONS[model_settings.get('resize_interpolation', 'linear')]
+        if self.model is not None:
+            self._prepare_model()
+            self.warm_up()
+            self.loaded = True
+        elif not defer_load:
+            self.load_model()
+
+    def load_model(self):
+        """Load the model if not loaded yet; safe to call from any thread"""
+        with self.load_lock:
+            if self.loaded:
+                return
+            started = time.perf_counter()
+            try:
+                if self.backend == 'keras':
+                    # The loader imports joblib / TensorFlow only when a model is loaded
+                    self.model = load_model_artifact(self.model_path, self.mmap_mode)
+                    self._prepare_model()
+                    if callable(self.model):
+                        self.model = KerasBackend(self.model)
+                else:
+                    # Exported runtimes need neither the Keras model nor TensorFlow
+                    self.model = create_backend(self.backend, path=self.backend_path,
+                                                num_threads=self.num_threads)
+                    self.normalize_in_model = getattr(self.model, 'input_dtype', None) == np.uint8
+                    self.input_dtype = np.uint8 if self.normalize_in_model else np.float32
+            except Exception as e:
+                self.model = None
+                raise RuntimeError(f"Failed to load model: {str(e)}")
+            load_time = time.perf_counter() - started
+            registry.gauge('model_load_seconds', lambda: load_time, 'Time to load the model artifact')
+            self.warm_up()
+            self.loaded = True
+
+    def warm_up(self):
+        """Run throwaway predictions so one-off costs are not paid by the first real one
+
+        They go through the same backend predict() as live predictions. The
+        first call at a new input shape allocates the runtime's buffers and
+        sets up CPU kernels for that shape, so every size in
+        model.warmup_batch_sizes is run warmup_runs times.
+        """
+        if self.warmup_runs <= 0:
+            return
+        started = time.perf_counter()
+        shape = (self.sequence_length, self.image_height, self.image_width, 3)
+        try:
+            for batch_size in self.warmup_batch_sizes:
+                batch = np.zeros((batch_size,) + shape, dtype=self.input_dtype)
+                for _ in range(self.warmup_runs):
+                    self.model.predict(batch, verbose=0)
+        except Exception as e:
+            print(f"Model warm-up failed: {str(e)}")
+            return
+        warmup_time = time.perf_counter() - started
+        registry.gauge('model_warmup_seconds', lambda: warmup_time, 'Time spent in warm-up predictions')
+
+    def is_loaded(self):
+        """Return True once the model can be used for predictions"""
+        return self.loaded
+
+    def _prepare_model(self):
+        """Apply model settings that need the loaded model"""
+        if self.config_manager.get_setting('model', {}).get('normalize_in_model', False):
+            self.normalize_in_model = self._fold_normalization()
+        self.input_dtype = np.uint8 if self.normalize_in_model else np.float32
+
+    def _fold_normalization(self):
+        """Move the /255 scaling into the model so it takes uint8 frames"""
+        try:
+            import tensorflow as tf
+            inputs = tf.keras.Input(shape=self.model.input_shape[1:], dtype='uint8')
+            scaled = tf.keras.layers.Rescaling(1.0 / 255.0)(inputs)
+            self.model = tf.keras.Model(inputs, self.model(scaled))
+            return True
+        except Exception as e:
+            print(f"Could not fold normalization into model, scaling on CPU: {str(e)}")
+            return False
+
     def update_processing_settings(self, performance_mode):
         """Update processing settings based on performance mode"""
         self.processing_settings = self.config_manager.get_processing_settings(performance_mode)
 
-    def preprocess_frame(self, frame):
-        """Preprocess a single frame"""
-        try:
-            # Apply resize factor based on performance settings
-            if self.processing_settings['resize_factor'] != 1.0:
-                h, w = frame.shape[:2]
-                new_size = (int(w * self.processing_settings['resize_factor']), 
-                          int(h * self.processing_settings['resize_factor']))
-                frame = cv2.resize(frame, new_size)
-            
-            # Resize to model input size
-            resized = cv2.resize(frame, (self.image_height, self.image_width))
-            normalized = resized / 255.0
-            return normalized
+    def preprocess_frame(self, frame, out=None):
+        """Preprocess a single frame, optionally into a preallocated array
+
+        The capture frame is resized once, straight to the model input size
+        (resize_factor only applies to display and motion detection). Frames
+        stay uint8 through resizing and are scaled to float32 in a single
+        step written straight into ``out``.
+        """
+        started = time.perf_counter()
+        try:
+            # cv2 takes (width, height)
+            resized = cv2.resize(frame, (self.image_width, self.image_height),
+                                 interpolation=self.interpolation)
+            if out is None:
+                out = np.empty(resized.shape, dtype=self.input_dtype)
+            if self.normalize_in_model:
+                out[...] = resized
+            else:
+                np.multiply(resized, PIXEL_SCALE, out=out, dtype=np.float32)
+            self.preprocess_time.observe(time.perf_counter() - started)
+            return out
         except Exception as e:
             raise RuntimeError(f"Frame preprocessing failed: {str(e)}")
 
+    def create_frame_buffer(self):
+        """Create a ring buffer sized for this model's input window"""
+        return FrameBuffer(self.sequence_length, (self.image_height, self.image_width, 3),
+                           dtype=self.input_dtype)
+
     def predict_frames(self, frames):
         """Make prediction on a sequence of frames"""
         if len(frames) != self.sequence_length:
@@ -47,16 +191,103 @@ class ModelService:
         
         try:
             # Prepare frames
-            processed_frames = np.array([self.preprocess_frame(frame) for frame in frames])
-            # Make prediction
-            prediction = self.model.predict(np.expand_dims(processed_frames, axis=0))[0]
-            # Get class and confidence
-            predicted_class = self.classes[np.argmax(prediction)]
-            confidence = float(prediction[np.argmax(prediction)])
-            
-            return predicted_class, confidence
+            processed_frames = np.empty((self.sequence_length, self.image_height, self.image_width, 3),
+                                        dtype=self.input_dtype)
+            for i, frame in enumerate(frames):
+                self.preprocess_frame(frame, out=processed_frames[i])
         except Exception as e:
             raise RuntimeError(f"Prediction failed: {str(e)}")
+        return self.predict_sequence(processed_frames)
+
+    def predict_sequence(self, sequence):
+        """Make prediction on an already preprocessed sequence of frames"""
+        if len(sequence) != self.sequence_length:
+            raise ValueError(f"Expected {self.sequence_length} frames, got {len(sequence)}")
+
+        if not self.loaded:
+            raise RuntimeError("Model is not loaded yet")
+        # Share model calls with other callers when micro-batching is on
+        if self.inference_server is not None:
+            try:
+                return self.inference_server.submit(sequence).result(self.inference_timeout)
+            except FutureTimeoutError:
+                raise RuntimeError(f"Prediction failed: no result within {self.inference_timeout}s")
+
+        try:
+            # Add the batch axis as a view, no copy of the window is made
+            with Timer(self.predict_time):
+                prediction = self.model.predict(sequence[np.newaxis])[0]
+            self.windows_inferred.inc()
+            return self._decode_prediction(prediction)
+        except Exception as e:
+            raise RuntimeError(f"Prediction failed: {str(e)}")
+
+    def predict_batch(self, sequences):
+        """Make predictions on several preprocessed sequences in one model call"""
+        if len(sequences) == 0:
+            return []
+        if not self.loaded:
+            raise RuntimeError("Model is not loaded yet")
+
+        try:
+            batch = np.stack(sequences) if not isinstance(sequences, np.ndarray) else sequences
+            with Timer(self.predict_time):
+                predictions = self.model.predict(batch)
+            self.windows_inferred.inc(len(batch))
+            return [self._decode_prediction(prediction) for prediction in predictions]
+        except Exception as e:
+            raise RuntimeError(f"Batch prediction failed: {str(e)}")
+
+    def predict_regions(self, frames, regions):
+        """Score crops of a raw frame sequence, one batch entry per region
+
+        Every frame is cropped to each region before preprocessing, so a
+        small area of a wide view fills the model input. Returns the most
+        confident Violence result if any region has one, otherwise the most
+        confident result overall.
+        """
+        if len(frames) != self.sequence_length:
+            raise ValueError(f"Expected {self.sequence_length} frames, got {len(frames)}")
+        if not regions:
+            return self.predict_frames(frames)
+
+        try:
+            shape = (len(regions), self.sequence_length, self.image_height, self.image_width, 3)
+            if self._region_batch is None or self._region_batch.shape[0] < len(regions):
+                self._region_batch = np.empty(shape, dtype=self.input_dtype)
+            batch = self._region_batch[:len(regions)]
+            for r, (x, y, w, h) in enumerate(regions):
+                for i, frame in enumerate(frames):
+                    self.preprocess_frame(frame[y:y + h, x:x + w], out=batch[r, i])
+        except Exception as e:
+            raise RuntimeError(f"Region preprocessing failed: {str(e)}")
+
+        results = self.predict_batch(batch)
+        violent = [result for result in results if result[0] == "Violence"]
+        return max(violent or results, key=lambda result: result[1])
+
+    def _decode_prediction(self, prediction):
+        """Get class and confidence from one row of model output"""
+        best = np.argmax(prediction)
+        return self.classes[best], float(prediction[best])
+
+    def start_inference_server(self, max_batch_size=8, max_wait_ms=10, result_timeout=5.0):
+        """Route predict_sequence calls through a micro-batching queue
+
+        predict_sequence raises RuntimeError if a result takes longer than
+        result_timeout seconds, rather than blocking its caller for good.
+        """
+        self.inference_timeout = result_timeout
+        if self.inference_server is None:
+            self.inference_server = InferenceServer(self, max_batch_size, max_wait_ms)
+            self.inference_server.start()
+        return self.inference_server
+
+    def stop_inference_server(self):
+        """Go back to one model call per predict_sequence"""
+        if self.inference_server is not None:
+            self.inference_server.stop()
+            self.inference_server = None
 
     def get_frame_sequence_size(self):
         """Return the required number of frames for prediction"""
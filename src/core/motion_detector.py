@@ -1,80 +1,172 @@
 import cv2
 import numpy as np
 
+def enclose_groups(boxes_array, rows, cols):
+    """Replace each connected group of (x1, y1, x2, y2) boxes by its enclosing box
+
+    Boxes rows[k] and cols[k] are connected; groups are found with
+    union-find over those pairs. Returns enclosing boxes largest first.
+    """
+    parent = list(range(len(boxes_array)))
+    def find(i):
+        while parent[i] != i:
+            parent[i] = parent[parent[i]]
+            i = parent[i]
+        return i
+    for i, j in zip(rows.tolist(), cols.tolist()):
+        root_i, root_j = find(i), find(j)
+        if root_i != root_j:
+            parent[root_j] = root_i
+
+    labels = np.array([find(i) for i in range(len(boxes_array))])
+    _, labels = np.unique(labels, return_inverse=True)
+    x1, y1, x2, y2 = boxes_array.T
+    merged = np.empty((labels.max() + 1, 4), dtype=boxes_array.dtype)
+    merged[labels] = boxes_array  # Any member box, widened below
+    np.minimum.at(merged[:, 0], labels, x1)
+    np.minimum.at(merged[:, 1], labels, y1)
+    np.maximum.at(merged[:, 2], labels, x2)
+    np.maximum.at(merged[:, 3], labels, y2)
+
+    # Largest first, like suppression
+    merged_areas = (merged[:, 2] - merged[:, 0]) * (merged[:, 3] - merged[:, 1])
+    return merged[merged_areas.argsort()[::-1]]
+
+
 class MotionDetector:
-    def __init__(self):
+    PAIRWISE_LIMIT = 256  # Largest box count merged with a full pairwise matrix
+
+    def __init__(self, analysis_width=None, merge_mode='suppress', merge_threshold=0.3):
+        """Initialize the motion detector
+
+        When analysis_width is set, wider frames are downscaled to that
+        width before background subtraction. min_area stays in input frame
+        pixels and returned boxes are mapped back to input coordinates.
+        """
         self.previous_frame = None
         self.min_area = 1000  # Increased minimum area to reduce sensitivity
+        self.analysis_width = analysis_width
+        if merge_mode not in ('suppress', 'union'):
+            raise ValueError(f"Unknown merge mode: {merge_mode}")
+        self.merge_mode = merge_mode
+        self.merge_threshold = merge_threshold
         self.background_subtractor = cv2.createBackgroundSubtractorMOG2(
             history=50, varThreshold=32, detectShadows=False)  # Increased threshold
+        self.kernel = cv2.getStructuringElement(cv2.MORPH_ELLIPSE, (3, 3))
 
     def detect_motion(self, frame):
         """Detect motion in frame and return regions of interest"""
-        # Apply background subtraction
-        fg_mask = self.background_subtractor.apply(frame)
-        
-        # Remove noise
-        kernel = cv2.getStructuringElement(cv2.MORPH_ELLIPSE, (3, 3))
-        fg_mask = cv2.erode(fg_mask, kernel, iterations=2)  # More erosion
-        fg_mask = cv2.dilate(fg_mask, kernel, iterations=3)
+        # Downscale to the analysis resolution
+        scale = 1.0
+        if self.analysis_width and frame.shape[1] > self.analysis_width:
+            scale = self.analysis_width / frame.shape[1]
+            frame = cv2.resize(frame, None, fx=scale, fy=scale, interpolation=cv2.INTER_AREA)
+
+        fg_mask = self.foreground_mask(frame)
         
         # Find contours
         contours, _ = cv2.findContours(fg_mask, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
         
         # Filter contours by area and get bounding boxes
+        min_area = self.min_area * scale * scale
         motion_regions = []
         for contour in contours:
-            if cv2.contourArea(contour) > self.min_area:
+            if cv2.contourArea(contour) > min_area:
                 x, y, w, h = cv2.boundingRect(contour)
                 motion_regions.append((x, y, w, h))
         
         # Merge overlapping boxes
-        return self.merge_boxes(motion_regions)
+        merged = self.merge_boxes(motion_regions)
+        if scale == 1.0:
+            return merged
+        # Map boxes back to input frame coordinates
+        return [(int(x / scale), int(y / scale), int(round(w / scale)), int(round(h / scale)))
+                for x, y, w, h in merged]
+
+    def foreground_mask(self, frame):
+        """Return a binary mask of moving pixels"""
+        # Apply background subtraction
+        fg_mask = self.background_subtractor.apply(frame)
+        
+        # Remove noise
+        fg_mask = cv2.erode(fg_mask, self.kernel, iterations=2)  # More erosion
+        return cv2.dilate(fg_mask, self.kernel, iterations=3)
 
     def merge_boxes(self, boxes):
-        """Merge overlapping bounding boxes"""
-        if not boxes:
+        """Merge overlapping bounding boxes
+
+        In 'suppress' mode (default) boxes are visited largest first and any
+        remaining box overlapping a kept one by more than merge_threshold of
+        its own area is dropped. In 'union' mode overlapping boxes are
+        grouped into connected components and each group is replaced by the
+        box enclosing it.
+        """
+        if len(boxes) == 0:
             return []
 
-        # Convert to a format suitable for NMS
-        boxes_array = np.array([[x, y, x + w, y + h] for (x, y, w, h) in boxes])
-        
-        # Calculate areas
+        boxes_array = np.asarray(boxes, dtype=np.int64).reshape(-1, 4).copy()
+        # Convert to (x1, y1, x2, y2)
+        boxes_array[:, 2:] += boxes_array[:, :2]
         areas = (boxes_array[:, 2] - boxes_array[:, 0]) * (boxes_array[:, 3] - boxes_array[:, 1])
-        
-        # Sort boxes by area
-        idxs = areas.argsort()
-        
-        # Initialize pick list
-        pick = []
-        
-        while len(idxs) > 0:
-            # Grab the last box (largest area)
-            last = len(idxs) - 1
-            i = idxs[last]
-            pick.append(i)
-            
-            # Find the overlap with remaining boxes
-            xx1 = np.maximum(boxes_array[i, 0], boxes_array[idxs[:last], 0])
-            yy1 = np.maximum(boxes_array[i, 1], boxes_array[idxs[:last], 1])
-            xx2 = np.minimum(boxes_array[i, 2], boxes_array[idxs[:last], 2])
-            yy2 = np.minimum(boxes_array[i, 3], boxes_array[idxs[:last], 3])
-            
-            # Calculate overlap area
-            w = np.maximum(0, xx2 - xx1)
-            h = np.maximum(0, yy2 - yy1)
-            overlap = (w * h) / areas[idxs[:last]]
-            
-            # Delete all indexes from the index list that exceed the overlap threshold
-            idxs = np.delete(idxs, np.concatenate(([last], np.where(overlap > 0.3)[0])))
-        
+
+        if self.merge_mode == 'union':
+            # Enclosing boxes can overlap each other, repeat until stable
+            merged = self._union_merge(boxes_array, areas)
+            while len(merged) < len(boxes_array):
+                boxes_array = merged
+                areas = (boxes_array[:, 2] - boxes_array[:, 0]) * (boxes_array[:, 3] - boxes_array[:, 1])
+                merged = self._union_merge(boxes_array, areas)
+        else:
+            merged = boxes_array[self._suppress(boxes_array, areas)]
+
         # Convert back to (x, y, w, h) format
-        merged_boxes = []
-        for i in pick:
-            x1, y1, x2, y2 = boxes_array[i]
-            merged_boxes.append((int(x1), int(y1), int(x2 - x1), int(y2 - y1)))
-        
-        return merged_boxes
+        return [(int(x1), int(y1), int(x2 - x1), int(y2 - y1)) for x1, y1, x2, y2 in merged]
+
+    def _suppress(self, boxes_array, areas):
+        """Return indices of boxes kept by largest-first suppression"""
+        order = areas.argsort()[::-1]  # Same visiting order as taking from the end of argsort()
+        limits = self.merge_threshold * areas
+        alive = np.ones(len(boxes_array), dtype=bool)
+        pick = []
+        if len(boxes_array) <= self.PAIRWISE_LIMIT:
+            # suppressed[i, j]: keeping box i drops box j
+            suppressed = self._pairwise_intersection(boxes_array) > limits
+            for i in order:
+                if alive[i]:
+                    pick.append(i)
+                    alive &= ~suppressed[i]
+            return pick
+
+        # Too many boxes for a full matrix, compute one row per kept box
+        x1, y1, x2, y2 = boxes_array.T
+        for i in order:
+            if alive[i]:
+                pick.append(i)
+                w = np.minimum(x2[i], x2) - np.maximum(x1[i], x1)
+                h = np.minimum(y2[i], y2) - np.maximum(y1[i], y1)
+                alive &= ~((w > 0) & (h > 0) & (w * h > limits))
+        return pick
+
+    @staticmethod
+    def _pairwise_intersection(boxes_array):
+        """Matrix of intersection areas between every pair of boxes"""
+        x1, y1, x2, y2 = boxes_array.astype(np.int32).T
+        w = np.minimum(x2[:, None], x2)
+        w -= np.maximum(x1[:, None], x1)
+        h = np.minimum(y2[:, None], y2)
+        h -= np.maximum(y1[:, None], y1)
+        np.maximum(w, 0, out=w)
+        np.maximum(h, 0, out=h)
+        w *= h
+        return w
+
+    def _union_merge(self, boxes_array, areas):
+        """Replace each group of overlapping boxes by its enclosing box"""
+        # Pairwise intersection relative to the smaller box of each pair
+        overlapping = (self._pairwise_intersection(boxes_array) >
+                       self.merge_threshold * np.minimum(areas[:, None], areas))
+        rows, cols = np.nonzero(np.triu(overlapping, k=1))
+        return enclose_groups(boxes_array, rows, cols)
 
     def draw_motion_regions(self, frame, regions, is_violence=False):
         """Draw motion regions on frame"""
@@ -85,4 +177,28 @@ class MotionDetector:
         for x, y, w, h in regions:
             cv2.rectangle(frame_copy, (x, y), (x + w, y + h), color, 2)
         
-        return frame_copy
\ No newline at end of file
+        return frame_copy
+
+
+class FrameDifferenceDetector(MotionDetector):
+    def __init__(self, analysis_width=None, merge_mode='suppress', merge_threshold=0.3,
+                 diff_threshold=25):
+        """Cheaper motion detector comparing each frame with the previous one
+
+        Skips the per-pixel background model of MOG2, at the cost of only
+        seeing the edges of slowly moving objects.
+        """
+        super().__init__(analysis_width, merge_mode, merge_threshold)
+        self.background_subtractor = None
+        self.diff_threshold = diff_threshold
+
+    def foreground_mask(self, frame):
+        """Return a binary mask of pixels that changed since the last frame"""
+        gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
+        if self.previous_frame is None or self.previous_frame.shape != gray.shape:
+            self.previous_frame = gray
+            return np.zeros_like(gray)
+        diff = cv2.absdiff(gray, self.previous_frame)
+        self.previous_frame = gray
+        _, fg_mask = cv2.threshold(diff, self.diff_threshold, 255, cv2.THRESH_BINARY)
+        return cv2.dilate(fg_mask, self.kernel, iterations=2)
@@ -0,0 +1,177 @@
+import threading
+import time
+
+from src.core.video_service import VideoService
+from src.utils.scheduler import InferenceScheduler
+
+FAIRNESS_POLICIES = ('round_robin', 'oldest_first')
+
+class StreamWorker(threading.Thread):
+    def __init__(self, engine, stream_id, source, callback=None):
+        """Capture one source and hand ready windows to the engine"""
+        super().__init__(daemon=True)
+        self.engine = engine
+        self.stream_id = stream_id
+        self.source = source
+        self.callback = callback
+        self.video_service = VideoService(engine.config_manager, engine.model_service.get_frame_sequence_size())
+        self.video_service.attach_model(engine.model_service)
+        self.scheduler = InferenceScheduler(self.video_service.processing_settings)
+        self.running = False
+        self.last_result = None  # (class, confidence, capture timestamp)
+        self.error = None
+
+    def run(self):
+        """Capture loop"""
+        self.running = True
+        try:
+            if not self.video_service.start_video_capture(self.source):
+                raise RuntimeError(f"Could not open source: {self.source}")
+            while self.running:
+                frame = self.video_service.get_frame(self.video_service.frame_timeout)
+                if frame is None:
+                    if self.video_service.stream_ended():
+                        break
+                    continue  # Stalled source, check whether we were stopped
+                now = time.time()
+                self.scheduler.frame_added()
+                sequence = self.video_service.get_processed_sequence()
+                if sequence is not None and self.scheduler.should_run(now):
+                    # The ring buffer keeps changing, so queue a private copy
+                    self.engine.submit(self, sequence.copy(), self.video_service.last_capture_time)
+                    self.scheduler.mark_run(now)
+        except Exception as e:
+            self.error = e
+        finally:
+            self.running = False
+            self.video_service.release()
+
+    def deliver(self, predicted_class, confidence, capture_time):
+        """Receive a prediction for this stream from the engine"""
+        self.last_result = (predicted_class, confidence, capture_time)
+        if self.callback is not None:
+            self.callback(self.stream_id, predicted_class, confidence, capture_time)
+
+    def stop(self):
+        """Stop capturing"""
+        self.running = False
+
+
+class MultiStreamEngine:
+    def __init__(self, model_service, config_manager):
+        """Run several sources against one shared, batched model
+
+        Each stream captures on its own thread and keeps at most one pending
+        window, replaced by newer windows so a lagging stream never scores
+        stale footage. A single inference thread gathers pending windows from
+        all streams into one model call and routes results back.
+        """
+        self.model_service = model_service
+        self.config_manager = config_manager
+        settings = self.config_manager.get_setting('multi_stream', {})
+        self.max_batch_size = max(1, settings.get('max_batch_size', 8))
+        self.max_wait = settings.get('max_wait_ms', 20) / 1000.0
+        self.fairness = settings.get('fairness', 'round_robin')
+        if self.fairness not in FAIRNESS_POLICIES:
+            raise ValueError(f"Unknown fairness policy: {self.fairness}")
+
+        self.streams = {}
+        self.pending = {}  # stream_id -> (worker, sequence, capture_time, submit_time)
+        self.condition = threading.Condition()
+        self.last_served = None  # Round-robin: id of the last stream put in a batch
+        self.running = False
+        self.inference_thread = None
+        self.batches_run = 0
+        self.windows_scored = 0
+
+    def add_stream(self, stream_id, source, callback=None):
+        """Register a source; started with the engine or immediately if running"""
+        if stream_id in self.streams:
+            raise ValueError(f"Stream already exists: {stream_id}")
+        worker = StreamWorker(self, stream_id, source, callback)
+        self.streams[stream_id] = worker
+        if self.running:
+            worker.start()
+        return worker
+
+    def remove_stream(self, stream_id):
+        """Stop and forget a source"""
+        worker = self.streams.pop(stream_id, None)
+        if worker is not None:
+            worker.stop()
+            with self.condition:
+                self.pending.pop(stream_id, None)
+
+    def start(self):
+        """Start all streams and the inference thread"""
+        self.running = True
+        self.inference_thread = threading.Thread(target=self._inference_loop, daemon=True)
+        self.inference_thread.start()
+        for worker in self.streams.values():
+            worker.start()
+
+    def stop(self):
+        """Stop all streams and the inference thread"""
+        self.running = False
+        for worker in self.streams.values():
+            worker.stop()
+        with self.condition:
+            self.condition.notify_all()
+        if self.inference_thread is not None:
+            self.inference_thread.join(timeout=2.0)
+            self.inference_thread = None
+        for worker in self.streams.values():
+            worker.join(timeout=2.0)
+
+    def submit(self, worker, sequence, capture_time):
+        """Queue a window for a stream, replacing any window not yet scored"""
+        with self.condition:
+            self.pending[worker.stream_id] = (worker, sequence, capture_time, time.time())
+            self.condition.notify()
+
+    def get_status(self):
+        """Return the last result of every stream"""
+        return {stream_id: worker.last_result for stream_id, worker in self.streams.items()}
+
+    def _select_batch(self):
+        """Take up to max_batch_size pending windows according to the fairness policy"""
+        if self.fairness == 'oldest_first':
+            order = sorted(self.pending, key=lambda stream_id: self.pending[stream_id][3])
+        else:
+            # Start with the stream after the last one served, in registration order
+            ids = list(self.streams)
+            start = ids.index(self.last_served) + 1 if self.last_served in ids else 0
+            order = [stream_id for stream_id in ids[start:] + ids[:start] if stream_id in self.pending]
+        order = order[:self.max_batch_size]
+        if order:
+            self.last_served = order[-1]
+        return [self.pending.pop(stream_id) for stream_id in order]
+
+    def _inference_loop(self):
+        """Gather pending windows from all streams and score them together"""
+        while self.running:
+            with self.condition:
+                while self.running and not self.pending:
+                    self.condition.wait(0.1)
+                if not self.running:
+                    break
+                # Give other streams a short chance to fill the batch
+                deadline = time.time() + self.max_wait
+                while self.running and len(self.pending) < min(self.max_batch_size, len(self.streams)):
+                    remaining = deadline - time.time()
+                    if remaining <= 0:
+                        break
+                    self.condition.wait(remaining)
+                batch = self._select_batch()
+
+            if not batch:
+                continue
+            try:
+                results = self.model_service.predict_batch([item[1] for item in batch])
+            except Exception as e:
+                print(f"Multi-stream inference error: {str(e)}")
+                continue
+            self.batches_run += 1
+            self.windows_scored += len(batch)
+            for (worker, _, capture_time, _), (predicted_class, confidence) in zip(batch, results):
+                worker.deliver(predicted_class, confidence, capture_time)
@@ -0,0 +1,88 @@
+import time
+
+import cv2
+import numpy as np
+
+def load_calibration_windows(paths, model_service, max_windows=200):
+    """Cut preprocessed model input windows out of video clips
+
+    Each clip contributes an equal share of max_windows, so a few long
+    clips do not crowd out the others. Within a clip the windows of
+    sequence_length consecutive frames start at evenly spaced positions
+    over its whole length, not just its opening seconds; clips that do not
+    report a frame count are read from the start. Returns a list of batches
+    of one window each, the format TF Lite calibration expects.
+    """
+    length = model_service.get_frame_sequence_size()
+    per_clip = max(1, -(-max_windows // max(1, len(paths))))
+    windows = []
+    for path in paths:
+        cap = cv2.VideoCapture(path)
+        try:
+            frame_count = int(cap.get(cv2.CAP_PROP_FRAME_COUNT))
+            if frame_count >= length:
+                last_start = frame_count - length
+                count = min(per_clip, last_start // length + 1)  # Windows never overlap
+                starts = np.linspace(0, last_start, count).astype(int)
+            else:
+                starts = np.arange(per_clip) * length
+            position = 0
+            for start in starts:
+                if len(windows) >= max_windows:
+                    break
+                # grab() skips without decoding the pixels and, unlike
+                # seeking, lands on exact frames with every codec
+                while position < start and cap.grab():
+                    position += 1
+                if position < start:
+                    break
+                frames = []
+                while len(frames) < length:
+                    ret, frame = cap.read()
+                    if not ret:
+                        break
+                    frames.append(model_service.preprocess_frame(frame))
+                position += len(frames)
+                if len(frames) < length:
+                    break
+                windows.append(np.stack(frames)[np.newaxis].astype(np.float32, copy=False))
+        finally:
+            cap.release()
+    return windows
+
+def agreement_report(reference, candidate, windows, classes):
+    """Compare a quantized backend with the float reference on the same windows
+
+    Agreement is reported overall and per class of the reference
+    prediction, with a confusion matrix (rows: reference class, columns:
+    candidate class), score differences and the mean latency of each model.
+    """
+    confusion = np.zeros((len(classes), len(classes)), dtype=np.int64)
+    differences = []
+    reference_time = candidate_time = 0.0
+    for batch in windows:
+        started = time.perf_counter()
+        expected = np.asarray(reference.predict(batch), dtype=np.float32)
+        reference_time += time.perf_counter() - started
+        started = time.perf_counter()
+        actual = np.asarray(candidate.predict(batch), dtype=np.float32)
+        candidate_time += time.perf_counter() - started
+        for row_expected, row_actual in zip(expected, actual):
+            confusion[row_expected.argmax(), row_actual.argmax()] += 1
+            differences.append(float(np.abs(row_expected - row_actual).max()))
+
+    total = int(confusion.sum())
+    per_class = {}
+    for i, name in enumerate(classes):
+        count = int(confusion[i].sum())
+        per_class[name] = {'windows': count, 'agreement': float(confusion[i, i]) / count if count else None}
+    return {
+        'windows': total,
+        'agreement': float(np.trace(confusion)) / total if total else 0.0,
+        'per_class': per_class,
+        'confusion': confusion.tolist(),
+        'max_score_diff': max(differences) if differences else 0.0,
+        'mean_score_diff': float(np.mean(differences)) if differences else 0.0,
+        'reference_ms_per_window': reference_time * 1000.0 / total if total else 0.0,
+        'candidate_ms_per_window': candidate_time * 1000.0 / total if total else 0.0,
+    }
@@ -0,0 +1,96 @@
+from collections import deque
+
+import numpy as np
+
+from src.core.motion_detector import enclose_groups
+
+class RegionTracker:
+    def __init__(self, window, settings=None, aspect_ratio=1.0):
+        """Track motion boxes over the sequence window to pick model crops
+
+        Boxes from the last ``window`` frames are combined so the crop stays
+        stable for the whole sequence instead of jumping frame to frame.
+        aspect_ratio is the model input width / height, crops are widened
+        or heightened to match so the model input is not distorted.
+        """
+        settings = settings or {}
+        self.padding = settings.get('padding', 0.15)  # Fraction of the box size added on each side
+        self.min_size = settings.get('min_size', 0.25)  # Fraction of the shorter frame side
+        self.max_regions = max(1, settings.get('max_regions', 3))
+        self.cluster_gap = settings.get('cluster_gap', 0.1)  # Fraction of the frame diagonal
+        self.aspect_ratio = aspect_ratio
+        self.history = deque(maxlen=window)
+
+    def update(self, regions, scale=1.0):
+        """Add one frame's motion boxes, given in coordinates scaled by ``scale``"""
+        self.history.append([(x / scale, y / scale, (x + w) / scale, (y + h) / scale)
+                             for x, y, w, h in regions])
+
+    def clear(self):
+        """Forget all tracked boxes"""
+        self.history.clear()
+
+    def get_regions(self, frame_shape, multi_region=False):
+        """Return crop regions (x, y, w, h) in capture frame coordinates
+
+        With multi_region, distant clusters of motion get separate crops
+        (largest first, at most max_regions); otherwise a single crop
+        covering all motion in the window is returned.
+        """
+        boxes = [box for frame_boxes in self.history for box in frame_boxes]
+        if not boxes:
+            return []
+
+        if multi_region:
+            height, width = frame_shape[:2]
+            gap = self.cluster_gap * (width ** 2 + height ** 2) ** 0.5
+            clusters = self._cluster(boxes, gap)
+            clusters.sort(key=lambda c: (c[2] - c[0]) * (c[3] - c[1]), reverse=True)
+            clusters = clusters[:self.max_regions]
+        else:
+            clusters = [self._union(boxes)]
+        return [self._fit(cluster, frame_shape) for cluster in clusters]
+
+    @staticmethod
+    def _union(boxes):
+        return (min(b[0] for b in boxes), min(b[1] for b in boxes),
+                max(b[2] for b in boxes), max(b[3] for b in boxes))
+
+    @staticmethod
+    def _cluster(boxes, gap):
+        """Merge boxes closer than gap until no two clusters are that close
+
+        Each pass groups all boxes within gap of each other in one pairwise
+        test and replaces every group by its enclosing box; passes repeat
+        only while enclosing boxes come within gap of each other.
+        """
+        clusters = np.asarray(boxes, dtype=np.float64).reshape(-1, 4)
+        while True:
+            x1, y1, x2, y2 = clusters.T
+            close = ((x1[:, None] - gap <= x2) & (x1 - gap <= x2[:, None]) &
+                     (y1[:, None] - gap <= y2) & (y1 - gap <= y2[:, None]))
+            rows, cols = np.nonzero(np.triu(close, k=1))
+            if len(rows) == 0:
+                return [tuple(box) for box in clusters.tolist()]
+            clusters = enclose_groups(clusters, rows, cols)
+
+    def _fit(self, box, frame_shape):
+        """Pad, enforce minimum size and aspect ratio, and clamp to the frame"""
+        height, width = frame_shape[:2]
+        x1, y1, x2, y2 = box
+        cx, cy = (x1 + x2) / 2, (y1 + y2) / 2
+        w = (x2 - x1) * (1 + 2 * self.padding)
+        h = (y2 - y1) * (1 + 2 * self.padding)
+        min_side = self.min_size * min(width, height)
+        w, h = max(w, min_side), max(h, min_side)
+
+        # Match the model aspect ratio by growing the short side
+        if w / h < self.aspect_ratio:
+            w = h * self.aspect_ratio
+        else:
+            h = w / self.aspect_ratio
+        w, h = min(w, width), min(h, height)
+
+        x = int(round(min(max(cx - w / 2, 0), width - w)))
+        y = int(round(min(max(cy - h / 2, 0), height - h)))
+        return x, y, int(round(w)), int(round(h))
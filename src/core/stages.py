@@ -0,0 +1,182 @@
+import time
+
+import cv2
+
+from src.core.motion_detector import FrameDifferenceDetector, MotionDetector
+from src.utils.metrics import Histogram
+
+STAGE_TIME_BUCKETS = (0.0005, 0.001, 0.002, 0.005, 0.01, 0.02, 0.05, 0.1, 0.25)
+
+class FrameContext:
+    def __init__(self, frame, timestamp):
+        """Per-frame data passed through the pipeline stages"""
+        self.frame = frame  # Full resolution capture frame, never modified
+        self.timestamp = timestamp
+        self.display_frame = frame
+        self.scale = 1.0  # display_frame size / frame size
+        self.motion_regions = []  # In display_frame coordinates
+        self.is_violence = False
+        self.show_boxes = True
+        self.rgb = False  # display_frame channel order
+        self.rendered = False  # The render stages ran on this frame
+
+
+class FrameStage:
+    name = 'stage'
+
+    def process(self, context):
+        """Analyze or modify the frame context in place"""
+        raise NotImplementedError
+
+    def reset(self):
+        """Drop per-source state, e.g. after switching sources"""
+
+
+class ResizeStage(FrameStage):
+    name = 'resize'
+
+    def __init__(self, get_resize_factor):
+        """Scale the capture frame down by the performance mode's resize factor"""
+        self.get_resize_factor = get_resize_factor
+
+    def process(self, context):
+        resize_factor = self.get_resize_factor()
+        context.scale = resize_factor
+        if resize_factor != 1.0:
+            context.display_frame = cv2.resize(context.frame, None, fx=resize_factor, fy=resize_factor,
+                                               interpolation=cv2.INTER_AREA)
+        else:
+            # Drawing stages copy before modifying, no copy needed here
+            context.display_frame = context.frame
+
+
+class MotionStage(FrameStage):
+    name = 'motion'
+
+    def __init__(self, detector):
+        """Find motion regions on the display frame"""
+        self.detector = detector
+        self.min_area = detector.min_area  # At full capture resolution
+
+    def process(self, context):
+        self.detector.min_area = self.min_area * context.scale ** 2
+        context.motion_regions = self.detector.detect_motion(context.display_frame)
+
+
+class RegionStage(FrameStage):
+    name = 'roi'
+
+    def __init__(self, tracker):
+        """Feed motion regions to the ROI tracker"""
+        self.tracker = tracker
+
+    def process(self, context):
+        self.tracker.update(context.motion_regions, context.scale)
+
+    def reset(self):
+        self.tracker.clear()
+
+
+class DisplayStage(FrameStage):
+    name = 'display'
+
+    def __init__(self, get_target_size):
+        """Scale to the display widget size and convert to RGB
+
+        get_target_size returns (width, height) of the widget or None. The
+        aspect ratio is kept and motion regions are scaled along with the
+        image so later drawing stages stay aligned.
+        """
+        self.get_target_size = get_target_size
+
+    def process(self, context):
+        frame = context.display_frame
+        target = self.get_target_size()
+        h, w = frame.shape[:2]
+        scale = min(target[0] / w, target[1] / h) if target else 1.0
+        if target and abs(scale - 1.0) > 1e-3:
+            size = (max(1, int(w * scale)), max(1, int(h * scale)))
+            interpolation = cv2.INTER_AREA if scale < 1.0 else cv2.INTER_LINEAR
+            frame = cv2.resize(frame, size, interpolation=interpolation)
+            # The resized frame is ours, convert it in place
+            context.display_frame = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB, dst=frame)
+            context.motion_regions = [(int(x * scale), int(y * scale), int(bw * scale), int(bh * scale))
+                                      for x, y, bw, bh in context.motion_regions]
+        elif frame is context.frame:
+            context.display_frame = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
+        else:
+            context.display_frame = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB, dst=frame)
+        context.rgb = True
+
+
+class DrawStage(FrameStage):
+    name = 'draw'
+
+    def process(self, context):
+        if context.motion_regions and context.show_boxes:
+            if context.display_frame is context.frame:
+                # Never draw on the capture frame, it is still buffered
+                context.display_frame = context.frame.copy()
+            color = (0, 0, 255) if context.is_violence else (0, 255, 0)
+            if context.rgb:
+                color = color[::-1]
+            for x, y, w, h in context.motion_regions:
+                cv2.rectangle(context.display_frame, (x, y), (x + w, y + h), color, 2)
+
+
+class FramePipeline:
+    def __init__(self, stages, metrics=None):
+        """Run stages in order, timing each one
+
+        With a MetricsRegistry, stage timings are registered in it as
+        stage_<name>_seconds so they are exported with the other metrics.
+        """
+        self.stages = list(stages)
+        if metrics is not None:
+            self.timings = {stage.name: metrics.histogram(f'stage_{stage.name}_seconds', STAGE_TIME_BUCKETS,
+                                                          f'Time of the {stage.name} pipeline stage')
+                            for stage in self.stages}
+        else:
+            self.timings = {stage.name: Histogram(STAGE_TIME_BUCKETS) for stage in self.stages}
+
+    def process(self, context):
+        """Run every stage on the context"""
+        for stage in self.stages:
+            started = time.perf_counter()
+            stage.process(context)
+            self.timings[stage.name].observe(time.perf_counter() - started)
+        return context
+
+    def get_stage(self, name):
+        """Return the stage with the given name, or None"""
+        for stage in self.stages:
+            if stage.name == name:
+                return stage
+        return None
+
+    def reset(self):
+        """Reset every stage"""
+        for stage in self.stages:
+            stage.reset()
+
+
+def create_motion_detector(settings):
+    """Build the motion detector selected by the pipeline settings"""
+    args = (settings.get('analysis_width'), settings.get('merge_mode', 'suppress'),
+            settings.get('merge_threshold', 0.3))
+    algorithm = settings.get('algorithm', 'mog2')
+    if algorithm == 'mog2':
+        return MotionDetector(*args)
+    if algorithm == 'frame_diff':
+        return FrameDifferenceDetector(*args, diff_threshold=settings.get('diff_threshold', 25))
+    raise ValueError(f"Unknown motion algorithm: {algorithm}")
+
+
+def build_pipeline(stage_names, factories, metrics=None):
+    """Compose a pipeline from stage names, each created by factories[name]()"""
+    stages = []
+    for name in stage_names:
+        if name not in factories:
+            raise ValueError(f"Unknown pipeline stage: {name}")
+        stages.append(factories[name]())
+    return FramePipeline(stages, metrics)
@@ -1,6 +1,11 @@
 from collections import deque
+import os
+import time
 import numpy as np
 import cv2
+from src.core.camera_discovery import CameraDiscovery
+from src.core.capture import CaptureThread
+from src.utils.metrics import registry
 
 class VideoService:
     def __init__(self, config_manager, sequence_length):
@@ -9,68 +14,72 @@ class VideoService:
         self.cap = None
         self.sequence_length = sequence_length
         self.frames_queue = deque(maxlen=sequence_length)
+        self.frame_buffer = None  # Preprocessed copy of frames_queue
+        self.preprocess = None
         self.frame_count = 0
         self.processing_settings = self.config_manager.get_processing_settings()
         self.current_source = None
+        self.capture_settings = self.config_manager.get_setting('capture', {})
+        self.capture_thread = None
+        self.source_is_file = False
+        self.last_capture_time = None  # Capture timestamp of the latest frame
+        self.capture_generation = 0  # CaptureThread generation of the buffered frames
+        self.frame_timeout = self.capture_settings.get('frame_timeout', 0.5)  # Longest a worker waits in get_frame()
+        self.camera_discovery = None  # Created on first use
+        self.capture_time = registry.histogram('capture_seconds', help_text='Time to read and decode one frame')
+        self.captured_rate = registry.rate('captured_fps', help_text='Frames read from the source per second')
+        self.frames_captured = registry.counter('frames_captured_total', 'Frames read from the source')
         
-    def get_available_cameras(self):
-        """Get list of available camera devices with names"""
-        available_cameras = []
+    def get_available_cameras(self, on_found=None, force_refresh=False):
+        """Get list of available camera devices with names
+
+        Devices are probed in parallel and cached (see CameraDiscovery);
+        on_found(camera) is called as each one is found. The camera in use
+        is not reopened.
+        """
+        if self.camera_discovery is None:
+            self.camera_discovery = CameraDiscovery(self.config_manager.get_setting('camera_discovery', {}))
+        skip = (self.current_source,) if isinstance(self.current_source, int) and self.cap is not None else ()
         try:
-            # Try to get default camera first
-            cap = cv2.VideoCapture(0)
-            if cap.isOpened():
-                ret, _ = cap.read()
-                if ret:
-                    width = int(cap.get(cv2.CAP_PROP_FRAME_WIDTH))
-                    height = int(cap.get(cv2.CAP_PROP_FRAME_HEIGHT))
-                    name = f"Default Camera ({width}x{height})"
-                else:
-                    name = "Default Camera"
-                available_cameras.append({"id": 0, "name": name})
-                cap.release()
-
-            # If we found the default camera, don't need to check index 0 again
-            start_idx = 1 if available_cameras else 0
-            
-            # Check additional cameras
-            for i in range(start_idx, 2):  # Only check first two indices to avoid long startup
-                try:
-                    cap = cv2.VideoCapture(i)
-                    if cap.isOpened():
-                        ret, _ = cap.read()
-                        if ret:
-                            width = int(cap.get(cv2.CAP_PROP_FRAME_WIDTH))
-                            height = int(cap.get(cv2.CAP_PROP_FRAME_HEIGHT))
-                            name = f"Camera {i} ({width}x{height})"
-                        else:
-                            name = f"Camera {i}"
-                        available_cameras.append({"id": i, "name": name})
-                        cap.release()
-                except Exception:
-                    continue
+            available_cameras = self.camera_discovery.discover(on_found, force_refresh, skip)
         except Exception as e:
             print(f"Error detecting cameras: {str(e)}")
-            
+            available_cameras = []
+
         # If no cameras found, add a dummy entry for testing
         if not available_cameras:
             available_cameras.append({"id": 0, "name": "Default Camera"})
-            
+
         return available_cameras
 
+    def attach_model(self, model_service):
+        """Preprocess frames for the given model once, as they are captured"""
+        self.preprocess = model_service.preprocess_frame
+        self.frame_buffer = model_service.create_frame_buffer()
+
     def switch_source(self, source):
-        """Switch to a different video source without stopping detection"""
-        if self.current_source == source:
+        """Switch to a different video source without stopping detection
+
+        With a running capture thread the new capture is swapped in between
+        two reads, so a worker waiting in get_frame() receives frames from
+        the new source instead of seeing the end of the stream.
+        """
+        if self.current_source == source and self.cap is not None:
             return True
             
         try:
             new_cap = cv2.VideoCapture(source)
             if new_cap.isOpened():
-                if self.cap is not None:
-                    self.cap.release()
-                self.cap = new_cap
-                self.current_source = source
-                self.frames_queue.clear()
+                if self.capture_thread is not None and not self.capture_thread.finished:
+                    # get_frame() drops the buffered window on the first new frame
+                    self.capture_thread.switch(lambda: self._replace_cap(new_cap, source))
+                    return True
+                restart_capture = self.capture_thread is not None
+                self._stop_capture_thread()
+                self._replace_cap(new_cap, source)
+                self.clear_frames()
+                if restart_capture:
+                    self._start_capture_thread()
                 return True
             else:
                 new_cap.release()
@@ -78,7 +87,52 @@ class VideoService:
         except Exception:
             return False
 
-    
+    def _replace_cap(self, new_cap, source):
+        """Release the current capture and use new_cap from now on"""
+        if self.cap is not None:
+            self.cap.release()
+        self.cap = new_cap
+        self.current_source = source
+        self.source_is_file = self.is_file_source(source)
+        if self.capture_thread is not None:
+            self._configure_capture_thread()
+
+    def is_file_source(self, source=None):
+        """Return True if the source is a video file rather than a live stream"""
+        if source is None:
+            source = self.current_source
+        return isinstance(source, str) and os.path.isfile(source)
+
+    def _start_capture_thread(self):
+        """Start reading frames on a dedicated thread"""
+        self.capture_thread = CaptureThread(self._capture_frame, queue_size=self.capture_settings.get('queue_size', 4))
+        self._configure_capture_thread()
+        self.capture_thread.start()
+
+    def _configure_capture_thread(self):
+        """Apply the overflow policy for the current source type"""
+        if self.source_is_file:
+            policy = self.capture_settings.get('file_overflow_policy', 'block')
+        else:
+            policy = self.capture_settings.get('live_overflow_policy', 'drop_oldest')
+            # Keep the driver from queueing stale frames behind ours
+            self.cap.set(cv2.CAP_PROP_BUFFERSIZE, 1)
+        self.capture_thread.overflow_policy = policy
+
+    def _stop_capture_thread(self):
+        """Stop the capture thread if running"""
+        if self.capture_thread is not None:
+            self.capture_thread.stop()
+            self.capture_thread = None
+            self.capture_generation = 0
+
+    @property
+    def dropped_frames(self):
+        """Number of frames dropped by the capture queue"""
+        if self.capture_thread is None:
+            return 0
+        return self.capture_thread.dropped_frames
+
     def set_playback_speed(self, speed):
         """Set video playback speed"""
         if self.cap:
@@ -89,39 +143,110 @@ class VideoService:
         success = self.switch_source(source)
         if success:
             self.original_fps = self.cap.get(cv2.CAP_PROP_FPS)
+            if self.capture_settings.get('threaded', True) and self.capture_thread is None:
+                self._start_capture_thread()
         return success
 
-    def get_frame(self):
-        """Get a single frame from the video source"""
+    def _capture_frame(self):
+        """Read a frame, recording read time and capture rate"""
+        started = time.perf_counter()
+        frame = self._read_frame()
+        if frame is not None:
+            self.capture_time.observe(time.perf_counter() - started)
+            self.captured_rate.tick()
+            self.frames_captured.inc()
+        return frame
+
+    def _read_frame(self):
+        """Read the next frame from the capture, applying frame skipping"""
         if self.cap is None:
             return None
 
         # Skip frames based on performance settings
         skip_frames = self.processing_settings['frame_skip']
-        
-        frame = None
-        for _ in range(skip_frames + 1):
-            ret, frame = self.cap.read()
-            if not ret:
+        if skip_frames > 0 and not self._seek_forward(skip_frames):
+            # Advance without decoding the pixel data of skipped frames
+            for _ in range(skip_frames):
+                if not self.cap.grab():
+                    return None
+                self.frame_count += 1
+
+        ret, frame = self.cap.read()
+        if not ret:
+            return None
+        self.frame_count += 1
+        return frame
+
+    def _seek_forward(self, skip_frames):
+        """Skip frames of a file source by seeking, if worthwhile and supported"""
+        if not self.source_is_file or skip_frames < self.capture_settings.get('seek_min_skip', 30):
+            return False
+        position = self.cap.get(cv2.CAP_PROP_POS_FRAMES)
+        if position < 0 or not self.cap.set(cv2.CAP_PROP_POS_FRAMES, position + skip_frames):
+            return False
+        self.frame_count += skip_frames
+        return True
+
+    def get_frame(self, timeout=None):
+        """Get a single frame from the video source
+
+        Returns None at the end of the stream, or when no frame arrived
+        within timeout seconds; stream_ended() tells the two apart.
+        """
+        if self.capture_thread is not None:
+            captured = self.capture_thread.get(timeout)
+            if captured is None:
                 return None
-            self.frame_count += 1
+            if captured.generation != self.capture_generation:
+                # First frame from a switched source
+                self.clear_frames()
+                self.capture_generation = captured.generation
+            frame = captured.frame
+            self.last_capture_time = captured.timestamp
+        else:
+            frame = self._capture_frame()
+            self.last_capture_time = time.time()
 
         if frame is not None:
             self.frames_queue.append(frame)
+            if self.frame_buffer is not None:
+                # Preprocess straight into the ring buffer slot
+                self.preprocess(frame, out=self.frame_buffer.next_slot())
+                self.frame_buffer.commit()
         return frame
 
+    def stream_ended(self):
+        """Return True if get_frame() returned None because the source has no more frames"""
+        if self.capture_thread is None:
+            return True
+        return self.capture_thread.ended()
+
     def get_frame_sequence(self):
         """Get the current sequence of frames"""
         if len(self.frames_queue) == self.sequence_length:
             return list(self.frames_queue)
         return None
 
+    def get_processed_sequence(self):
+        """Get the current sequence of preprocessed frames as a buffer view"""
+        if self.frame_buffer is None:
+            return None
+        return self.frame_buffer.get_sequence()
+
+    def clear_frames(self):
+        """Drop buffered raw and preprocessed frames"""
+        self.frames_queue.clear()
+        if self.frame_buffer is not None:
+            self.frame_buffer.clear()
+
     def release(self):
         """Release the video capture"""
+        self._stop_capture_thread()
         if self.cap is not None:
             self.cap.release()
             self.cap = None
-            self.frames_queue.clear()
+            self.current_source = None
+            self.clear_frames()
             self.frame_count = 0
 
     def update_processing_settings(self, performance_mode):
@@ -1,3 +1,8 @@
+import time
+
+# Taken before anything else is imported so startup phases include imports
+STARTED = time.perf_counter()
+
 import sys
 import os
 
@@ -5,13 +10,18 @@ import os
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 from PyQt5.QtWidgets import QApplication
+from src.core.event_store import EventStore
 from src.core.model_service import ModelService
 from src.core.video_service import VideoService
 from src.ui.main_window import MainWindow
 from src.utils.config import ConfigManager
+from src.utils.metrics import PhaseTimer, registry, start_exporters
 from src.utils.sound import SoundManager
 
 def main():
+    startup = PhaseTimer('startup', STARTED, registry)
+    startup.mark('imported')
+
     # Initialize application
     app = QApplication(sys.argv)
 
@@ -19,20 +29,42 @@ def main():
         # Initialize configuration
         config_manager = ConfigManager()
 
-        # Initialize services
-        model_service = ModelService(config_manager)
+        # Initialize services; the model itself is loaded once the window is up
+        model_service = ModelService(config_manager, defer_load=True)
+        server_settings = config_manager.get_setting('inference_server', {})
+        if server_settings.get('enabled', False):
+            model_service.start_inference_server(server_settings.get('max_batch_size', 8),
+                                                 server_settings.get('max_wait_ms', 10),
+                                                 server_settings.get('result_timeout', 5.0))
         video_service = VideoService(config_manager, model_service.get_frame_sequence_size())
         sound_manager = SoundManager(config_manager)
+        exporters = start_exporters(config_manager.get_setting('metrics', {}))
+        event_store = None
+        store_settings = config_manager.get_setting('event_store', {})
+        if store_settings.get('enabled', False):
+            event_store = EventStore(store_settings.get('path', 'events.db'),
+                                     store_settings.get('batch_size', 100),
+                                     store_settings.get('flush_interval', 1.0))
+            event_store.start()
+        startup.mark('services_ready')
 
         # Create and show main window
-        window = MainWindow(model_service, video_service, config_manager, sound_manager)
+        window = MainWindow(model_service, video_service, config_manager, sound_manager, event_store,
+                            startup)
         window.show()
+        startup.mark('window_shown')
 
         # Start event loop
-        sys.exit(app.exec_())
+        exit_code = app.exec_()
+        model_service.stop_inference_server()
+        for exporter in exporters:
+            exporter.stop()
+        if event_store is not None:
+            event_store.stop()
+        sys.exit(exit_code)
     except Exception as e:
         print(f"Error: {str(e)}")
         sys.exit(1)
 
 if __name__ == '__main__':
-    main()
\ No newline at end of file
+    main()
@@ -0,0 +1,57 @@
+import logging
+import logging.handlers
+from collections import deque
+
+from PyQt5.QtCore import QAbstractListModel, QModelIndex, Qt
+
+class EventLogModel(QAbstractListModel):
+    def __init__(self, max_entries=1000, spill_file=None, max_bytes=1048576, backup_count=3, parent=None):
+        """Fixed-size event log for a QListView
+
+        Only the newest max_entries messages are kept in memory. With
+        spill_file set, messages pushed out of the buffer are written to a
+        rotating log file so long sessions keep their history on disk.
+        """
+        super().__init__(parent)
+        self.entries = deque(maxlen=max(1, max_entries))
+        self.spill_logger = None
+        if spill_file:
+            handler = logging.handlers.RotatingFileHandler(
+                spill_file, maxBytes=max_bytes, backupCount=backup_count, encoding='utf-8')
+            handler.setFormatter(logging.Formatter('%(message)s'))
+            self.spill_logger = logging.getLogger(f'{__name__}.{id(self)}')
+            self.spill_logger.setLevel(logging.INFO)
+            self.spill_logger.propagate = False
+            self.spill_logger.addHandler(handler)
+
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self.entries)
+
+    def data(self, index, role=Qt.DisplayRole):
+        if role == Qt.DisplayRole and index.isValid() and index.row() < len(self.entries):
+            return self.entries[index.row()]
+        return None
+
+    def append(self, message):
+        """Add a message, dropping (or spilling) the oldest when full"""
+        if len(self.entries) == self.entries.maxlen:
+            self.beginRemoveRows(QModelIndex(), 0, 0)
+            oldest = self.entries.popleft()
+            self.endRemoveRows()
+            if self.spill_logger is not None:
+                self.spill_logger.info(oldest)
+        row = len(self.entries)
+        self.beginInsertRows(QModelIndex(), row, row)
+        self.entries.append(message)
+        self.endInsertRows()
+
+    def close(self):
+        """Write the buffered messages to the spill file and close it"""
+        if self.spill_logger is None:
+            return
+        for message in self.entries:
+            self.spill_logger.info(message)
+        for handler in list(self.spill_logger.handlers):
+            handler.close()
+            self.spill_logger.removeHandler(handler)
+        self.spill_logger = None
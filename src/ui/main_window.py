@@ -4,38 +4,36 @@
 import sys
 import os
 from PyQt5.QtCore import QObject, pyqtSignal
-import cv2
 import time
-from src.core.motion_detector import MotionDetector
 from PyQt5.QtWidgets import (QMainWindow, QWidget, QVBoxLayout, QHBoxLayout,
                             QPushButton, QLabel, QComboBox, QFileDialog, 
-                            QScrollArea, QTextEdit, QSlider, QCheckBox, 
+                            QScrollArea, QSlider, QCheckBox, 
                             QDoubleSpinBox, QApplication)  # Added QApplication here
 from PyQt5.QtCore import Qt, QThread
 
-try:
-    import cv2
-    print("OpenCV imported successfully:", cv2.__version__)
-except ImportError as e:
-    print("Failed to import OpenCV:", str(e))
-
-import numpy as np
 from datetime import datetime
 from PyQt5.QtWidgets import (QMainWindow, QWidget, QVBoxLayout, QHBoxLayout,
                              QPushButton, QLabel, QComboBox, QFileDialog, 
-                             QScrollArea, QTextEdit, QSlider, QCheckBox)
-from PyQt5.QtCore import Qt, QThread
-from PyQt5.QtGui import QImage, QPixmap, QColor
-from src.utils.worker import DetectionWorker
+                             QScrollArea, QSlider, QCheckBox, QListView)
+from PyQt5.QtCore import Qt, QThread, QTimer
+from PyQt5.QtGui import QPixmap
+from src.ui.event_log import EventLogModel
+from src.utils.metrics import registry
+from src.utils.worker import CameraDiscoveryWorker, DetectionWorker, ModelLoader
 
 class MainWindow(QMainWindow):
-    def __init__(self, model_service, video_service, config_manager, sound_manager):
+    def __init__(self, model_service, video_service, config_manager, sound_manager, event_store=None,
+                 startup=None):
         super().__init__()
+        self.event_store = event_store
+        self.startup = startup  # Optional PhaseTimer recording startup phases
         self.model_service = model_service
         self.video_service = video_service
         self.config_manager = config_manager
         self.sound_manager = sound_manager
         self.alert_active = False
+        self.last_latency = 0.0
+        self.dropped_frames = 0
         
         self.v_pressed = False
         self.n_pressed = False
@@ -44,6 +42,10 @@ class MainWindow(QMainWindow):
         # Worker thread setup
         self.worker = None
         self.worker_thread = None
+        self.loader = None
+        self.loader_thread = None
+        self.discovery = None
+        self.discovery_thread = None
         
         self.k_pressed = False
         self.n_pressed = False
@@ -55,6 +57,11 @@ class MainWindow(QMainWindow):
         if geometry:
             self.restoreGeometry(bytes.fromhex(geometry))
 
+        # Slow startup work runs once the window is up
+        if not self.model_service.is_loaded():
+            self.start_model_loading()
+        QTimer.singleShot(0, self.update_camera_list)
+
     def init_ui(self):
         """Initialize the UI"""
         self.setWindowTitle('Violence Detection System')
@@ -89,10 +96,17 @@ class MainWindow(QMainWindow):
         source_layout.addWidget(self.source_combo)
         
         # Camera selection
+        self.camera_row = QWidget()
+        camera_layout = QHBoxLayout(self.camera_row)
+        camera_layout.setContentsMargins(0, 0, 0, 0)
         self.camera_combo = QComboBox()
-        self.update_camera_list()
-        self.camera_combo.setVisible(True)
-        source_layout.addWidget(self.camera_combo)
+        self.camera_combo.addItem('Searching for cameras...')
+        camera_layout.addWidget(self.camera_combo, stretch=1)
+        self.refresh_cameras_button = QPushButton('Refresh')
+        self.refresh_cameras_button.clicked.connect(lambda: self.update_camera_list(force_refresh=True))
+        camera_layout.addWidget(self.refresh_cameras_button)
+        self.camera_row.setVisible(True)
+        source_layout.addWidget(self.camera_row)
         right_layout.addWidget(source_group)
 
         # Control buttons
@@ -148,19 +162,44 @@ class MainWindow(QMainWindow):
             lambda state: self.sound_manager.toggle_sound(bool(state))
         )
         options_layout.addWidget(self.sound_checkbox)
+
+        # Add pipeline stats toggle
+        metrics_settings = self.config_manager.get_setting('metrics', {})
+        self.stats_checkbox = QCheckBox('Show Pipeline Stats')
+        self.stats_checkbox.setChecked(metrics_settings.get('show_panel', False))
+        self.stats_checkbox.stateChanged.connect(lambda state: self.toggle_stats(bool(state)))
+        options_layout.addWidget(self.stats_checkbox)
         
         status_layout.addWidget(self.status_label)
         status_layout.addWidget(self.confidence_label)
         status_layout.addWidget(options_group)
+
+        # Pipeline stats panel, refreshed from the metrics registry
+        self.stats_label = QLabel()
+        self.stats_label.setStyleSheet("QLabel { font-family: monospace; }")
+        self.stats_label.setTextInteractionFlags(Qt.TextSelectableByMouse)
+        status_layout.addWidget(self.stats_label)
+        self.stats_timer = QTimer(self)
+        self.stats_timer.setInterval(int(metrics_settings.get('panel_interval', 1.0) * 1000))
+        self.stats_timer.timeout.connect(self.update_stats)
+        self.display_time = registry.histogram('gui_display_seconds', help_text='GUI thread time per displayed frame')
+        self.toggle_stats(self.stats_checkbox.isChecked())
         right_layout.addWidget(status_group)
 
         # Event log
         log_group = QWidget()
         log_layout = QVBoxLayout(log_group)
         log_layout.addWidget(QLabel('Event Log:'))
-        self.log_text = QTextEdit()
-        self.log_text.setReadOnly(True)
-        log_layout.addWidget(self.log_text)
+        log_settings = self.config_manager.get_setting('event_log', {})
+        self.log_model = EventLogModel(log_settings.get('max_entries', 1000),
+                                       log_settings.get('spill_file'),
+                                       log_settings.get('max_bytes', 1048576),
+                                       log_settings.get('backup_count', 3), self)
+        self.log_view = QListView()
+        self.log_view.setModel(self.log_model)
+        self.log_view.setUniformItemSizes(True)  # Lets the view skip measuring every row
+        self.log_view.setEditTriggers(QListView.NoEditTriggers)
+        log_layout.addWidget(self.log_view)
         right_layout.addWidget(log_group)
 
         # Add panels to main layout
@@ -188,14 +227,79 @@ class MainWindow(QMainWindow):
         if self.video_service:
             self.video_service.set_playback_speed(value)
 
-    def update_camera_list(self):
-        """Update the list of available cameras"""
+    def start_model_loading(self):
+        """Load the model on a background thread; Start is enabled when it is ready"""
+        self.start_button.setEnabled(False)
+        self.status_label.setText('Status: Loading model...')
+        self.loader_thread = QThread()
+        self.loader = ModelLoader(self.model_service)
+        self.loader.moveToThread(self.loader_thread)
+        self.loader_thread.started.connect(self.loader.run)
+        self.loader.loaded.connect(self.handle_model_loaded)
+        self.loader.failed.connect(self.handle_model_failed)
+        self.loader.loaded.connect(self.loader_thread.quit)
+        self.loader.failed.connect(self.loader_thread.quit)
+        self.loader_thread.start()
+
+    def handle_model_loaded(self, seconds):
+        """Enable detection once the model is ready"""
+        self.start_button.setEnabled(self.worker is None)
+        self.status_label.setText('Status: Ready')
+        self.log_event(f'Model loaded in {seconds:.1f}s')
+        if self.startup is not None:
+            self.startup.mark('model_loaded')
+            self.log_event(f'Startup: {self.startup.summary()}')
+
+    def handle_model_failed(self, error_message):
+        """Report a model that could not be loaded"""
+        self.status_label.setText('Error: Model not loaded')
+        self.log_event(f'Error: {error_message}')
+
+    def update_camera_list(self, force_refresh=False):
+        """Update the list of available cameras from a background discovery"""
+        if self.discovery_thread is not None:
+            return
+        self.refresh_cameras_button.setEnabled(False)
+        self.camera_combo.clear()
+        self.camera_combo.addItem('Searching for cameras...')
+        self.discovery_thread = QThread()
+        self.discovery = CameraDiscoveryWorker(self.video_service, force_refresh)
+        self.discovery.moveToThread(self.discovery_thread)
+        self.discovery_thread.started.connect(self.discovery.run)
+        self.discovery.camera_found.connect(self.add_camera)
+        self.discovery.finished.connect(self.handle_cameras_listed)
+        # Quit from the discovery thread itself so handle_cameras_listed can wait on it
+        self.discovery.finished.connect(self.discovery_thread.quit, Qt.DirectConnection)
+        self.discovery_thread.start()
+
+    def add_camera(self, camera):
+        """Add a discovered camera, keeping the list ordered by index"""
+        if self.camera_combo.findData(camera['id']) >= 0:
+            return
+        if self.camera_combo.count() == 1 and self.camera_combo.itemData(0) is None:
+            self.camera_combo.clear()  # Drop the placeholder
+        row = 0
+        while row < self.camera_combo.count() and self.camera_combo.itemData(row) < camera['id']:
+            row += 1
+        self.camera_combo.insertItem(row, camera['name'], camera['id'])
+        self.select_last_camera()
+
+    def handle_cameras_listed(self, cameras):
+        """Show the complete camera list once discovery finished"""
+        self.discovery_thread.wait()
+        self.discovery_thread = None
+        self.discovery = None
         self.camera_combo.clear()
-        cameras = self.video_service.get_available_cameras()
         for camera in cameras:
             self.camera_combo.addItem(camera['name'], camera['id'])
-        
-        # Select last used camera if available
+        self.select_last_camera()
+        self.refresh_cameras_button.setEnabled(True)
+        if self.startup is not None and not any(
+                name == 'cameras_listed' for name, _ in self.startup.phases):
+            self.startup.mark('cameras_listed')
+
+    def select_last_camera(self):
+        """Select last used camera if available"""
         last_camera = self.config_manager.get_setting('last_camera', 0)
         index = self.camera_combo.findData(last_camera)
         if index >= 0:
@@ -203,7 +307,7 @@ class MainWindow(QMainWindow):
 
     def handle_source_change(self, source_type):
         """Handle changes in source selection"""
-        self.camera_combo.setVisible(source_type == 'Camera')
+        self.camera_row.setVisible(source_type == 'Camera')
 
     def update_performance_mode(self):
         """Update the performance mode based on slider value"""
@@ -222,7 +326,12 @@ class MainWindow(QMainWindow):
     def log_event(self, message):
         """Add event to log with timestamp"""
         timestamp = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
-        self.log_text.append(f'[{timestamp}] {message}')
+        scrollbar = self.log_view.verticalScrollBar()
+        at_bottom = scrollbar.value() == scrollbar.maximum()
+        self.log_model.append(f'[{timestamp}] {message}')
+        if at_bottom:
+            # Follow new events unless the user scrolled back
+            self.log_view.scrollToBottom()
 
     def start_detection(self):
         """Start the detection process"""
@@ -253,7 +362,7 @@ class MainWindow(QMainWindow):
         self.status_label.setText('Status: Stopped')
         self.confidence_label.setText('Confidence: -')
         self.video_label.clear()
-        self.start_button.setEnabled(True)
+        self.start_button.setEnabled(self.model_service.is_loaded())
         self.stop_button.setEnabled(False)
         self.source_combo.setEnabled(True)
         self.camera_combo.setEnabled(True)
@@ -265,9 +374,12 @@ class MainWindow(QMainWindow):
         """Initialize the worker thread"""
         # Create thread and worker
         self.worker_thread = QThread()
-        self.worker = DetectionWorker(self.video_service, self.model_service)
+        self.worker = DetectionWorker(self.video_service, self.model_service, self.event_store)
         self.worker.moveToThread(self.worker_thread)
         
+        # Frames are scaled to the video widget in the worker
+        self.worker.set_display_size(self.video_label.width(), self.video_label.height())
+
         # Set initial box display state
         self.worker.setShowBoxes(self.motion_boxes_checkbox.isChecked())
         
@@ -280,6 +392,9 @@ class MainWindow(QMainWindow):
         self.worker_thread.started.connect(self.worker.run)
         self.worker.frame_ready.connect(self.update_display)
         self.worker.prediction_ready.connect(self.handle_prediction)
+        self.worker.rates_ready.connect(self.handle_rates)
+        self.worker.latency_ready.connect(self.handle_latency)
+        self.worker.clip_saved.connect(lambda path: self.log_event(f'Clip saved: {path}'))
         self.worker.error.connect(self.handle_error)
 
         # Start thread
@@ -295,16 +410,45 @@ class MainWindow(QMainWindow):
         self.worker = None
         self.worker_thread = None
 
-    def update_display(self, frame):
-        """Update the video display with a new frame"""
-        if frame is not None:
-            rgb_frame = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
-            h, w, ch = rgb_frame.shape
-            bytes_per_line = ch * w
-            qt_image = QImage(rgb_frame.data, w, h, bytes_per_line, QImage.Format_RGB888)
-            self.video_label.setPixmap(QPixmap.fromImage(qt_image).scaled(
-                self.video_label.size(), Qt.KeepAspectRatio))
-            
+    def update_display(self, image):
+        """Show a frame already scaled and converted by the worker"""
+        if image is not None:
+            started = time.perf_counter()
+            self.video_label.setPixmap(QPixmap.fromImage(image))
+            self.display_time.observe(time.perf_counter() - started)
+        if self.worker:
+            self.worker.frame_displayed()
+
+    def toggle_stats(self, show):
+        """Show or hide the pipeline stats panel"""
+        self.stats_label.setVisible(show)
+        if show:
+            self.update_stats()
+            self.stats_timer.start()
+        else:
+            self.stats_timer.stop()
+
+    def update_stats(self):
+        """Refresh the stats panel from the metrics registry"""
+        snapshot = registry.snapshot()
+        rates, timings, counts = [], [], []
+        for name, value in snapshot.items():
+            if isinstance(value, dict):
+                if value['count']:
+                    timings.append(f"{name.replace('_seconds', ''):<22} {value['mean'] * 1000:7.1f} "
+                                   f"{value['p95'] * 1000:7.1f} ms")
+            elif name.endswith('_fps'):
+                rates.append(f"{name:<22} {value:7.1f}")
+            elif value is not None:
+                counts.append(f"{name:<22} {value:7}")
+        header = f"{'stage':<22} {'mean':>7} {'p95':>7}"
+        self.stats_label.setText('\n'.join(rates + [''] + [header] + timings + [''] + counts))
+
+    def resizeEvent(self, event):
+        """Keep the worker's display size in sync with the video widget"""
+        super().resizeEvent(event)
+        if self.worker:
+            self.worker.set_display_size(self.video_label.width(), self.video_label.height())
     
     def mousePressEvent(self, event):
         """Handle mouse press events"""
@@ -370,9 +514,23 @@ class MainWindow(QMainWindow):
             self.alert_active = is_violence
             self.update_alert_style(is_violence)
             if is_violence:
-                self.log_event(f'Violence detected (Confidence: {confidence:.2f})')
+                self.log_event(f'Violence detected (Confidence: {confidence:.2f}, '
+                               f'latency: {self.last_latency * 1000:.0f} ms)')
                 self.sound_manager.play_alert()
 
+    def handle_rates(self, capture_fps, inference_rate, gated_runs):
+        """Show effective inference rate against capture rate"""
+        ratio = inference_rate / capture_fps if capture_fps > 0 else 0.0
+        self.statusBar().showMessage(
+            f'Capture: {capture_fps:.1f} fps | Inference: {inference_rate:.1f}/s ({ratio:.0%} of frames)'
+            f' | Skipped (no motion): {gated_runs}'
+            f' | Latency: {self.last_latency * 1000:.0f} ms | Dropped: {self.dropped_frames}')
+
+    def handle_latency(self, latency, dropped_frames):
+        """Track capture-to-prediction latency and dropped frames"""
+        self.last_latency = latency
+        self.dropped_frames = dropped_frames
+
     def handle_error(self, error_message):
         """Handle errors from the worker"""
         self.log_event(f"Error: {error_message}")
@@ -401,4 +559,10 @@ class MainWindow(QMainWindow):
         
         # Stop detection and cleanup
         self.stop_detection()
+        # A QThread must not be destroyed while running
+        if self.loader_thread is not None and self.loader_thread.isRunning():
+            self.loader_thread.wait()
+        if self.discovery_thread is not None:
+            self.discovery_thread.wait()
+        self.log_model.close()
         event.accept()
\ No newline at end of file
@@ -8,18 +8,129 @@ DEFAULT_CONFIG = {
     'last_source': 'Camera',
     'camera_index': 0,
     'alert_sound_enabled': True,
+    'camera_discovery': {
+        'max_index': 8,  # Probe camera indices 0..max_index-1
+        'workers': 4,  # Devices probed in parallel
+        'ttl': 300.0,  # Seconds a discovered camera list is reused
+        'timeout': 10.0,  # Give up on devices still opening after this many seconds
+        'read_frame': True,  # Read a frame to confirm each device works
+        'cache_file': 'camera_cache.json'  # Last discovered cameras, written by CameraDiscovery
+    },
+    'capture': {
+        'threaded': True,  # Read frames on a dedicated thread
+        'queue_size': 4,
+        'live_overflow_policy': 'drop_oldest',  # drop_oldest, drop_newest or block
+        'file_overflow_policy': 'block',
+        'seek_min_skip': 30,  # Seek instead of grab() when skipping this many file frames
+        'frame_timeout': 0.5  # Seconds a worker waits for a frame before checking whether it was stopped
+    },
+    'motion': {
+        'analysis_width': 320,  # Run motion detection at this width (None = full size)
+        'merge_mode': 'suppress',  # suppress: drop overlapped boxes, union: enclose overlapping groups
+        'merge_threshold': 0.3,
+        'algorithm': 'mog2',  # mog2 or frame_diff (cheaper)
+        'diff_threshold': 25  # Pixel change counted as motion by frame_diff
+    },
+    'pipeline': {
+        'analysis': ['resize', 'motion', 'roi'],  # Stages run before inference
+        'render': ['display', 'draw']  # Stages run after inference, on displayed frames only
+    },
+    'display': {
+        'max_fps': 30,  # Cap on frames sent to the GUI, 0 for no cap
+        'prediction_interval': 0.25  # Min seconds between unchanged prediction updates
+    },
+    'event_store': {
+        'enabled': False,  # Record every model prediction in an SQLite database
+        'path': 'events.db',
+        'batch_size': 100,  # Max events per write transaction
+        'flush_interval': 1.0  # Max seconds an event waits before being written
+    },
+    'clip_recording': {
+        'enabled': False,  # Save footage around violence detections (can be set per source)
+        'pre_seconds': 10.0,
+        'post_seconds': 10.0,
+        'max_buffer_mb': 64,  # Cap on the compressed pre-event buffer per stream
+        'jpeg_quality': 80,
+        'queue_size': 8,  # Raw frames waiting for the encoder thread before new ones are dropped
+        'output_dir': 'clips',
+        'codec': 'mp4v',
+        'extension': '.mp4'
+    },
+    'metrics': {
+        'show_panel': False,  # Show pipeline stats in the main window
+        'panel_interval': 1.0,  # Seconds between stats panel refreshes
+        'http_port': 0,  # Serve Prometheus text on http://host:port/metrics, 0 to disable
+        'http_host': '127.0.0.1',
+        'namespace': 'vds',  # Prefix of exported metric names
+        'json_path': None,  # Periodically write a JSON snapshot here
+        'json_interval': 10.0
+    },
+    'event_log': {
+        'max_entries': 1000,  # Events kept in the on-screen log
+        'spill_file': None,  # Rotating file for events dropped from the on-screen log
+        'max_bytes': 1048576,
+        'backup_count': 3
+    },
+    # Per-source overrides of whole settings sections, keyed by camera index or path,
+    # e.g. {"0": {"motion": {"algorithm": "frame_diff"}}}
+    'source_overrides': {},
+    'motion_gate': {
+        'enabled': False,  # Only run the model when there is motion
+        'metric': 'area',  # area: current frame, energy: mean over the window
+        'threshold': 0.002,  # Fraction of the frame covered by motion boxes
+        'hold_frames': 16  # Keep scoring this many frames after motion stops
+    },
+    'roi': {
+        'enabled': False,  # Crop the model input to motion regions
+        'padding': 0.15,  # Fraction of the region size added on each side
+        'min_size': 0.25,  # Minimum crop side as a fraction of the shorter frame side
+        'multi_region': False,  # Score distant motion clusters as separate crops
+        'max_regions': 3,
+        'cluster_gap': 0.1  # Clusters further apart than this fraction of the diagonal stay separate
+    },
+    'model': {
+        'path': 'models/violence_detection_model.joblib',  # .joblib, .keras/.h5 or SavedModel directory
+        'config_path': 'models/model_config.joblib',  # .joblib or .json
+        'mmap_mode': None,  # e.g. "r" to memory-map uncompressed weight arrays while loading
+        'backend': 'keras',  # keras, tflite or onnx (see `python -m src.cli export`)
+        'backend_path': None,  # Exported model file for the tflite / onnx backends
+        'num_threads': 0,  # Inference threads for tflite / onnx, 0 for the runtime default
+        'quantized': False,  # Run the INT8 model at quantized_path (overrides backend)
+        'quantized_path': 'models/violence_detection_model.int8.tflite',
+        'warmup_runs': 1,  # Throwaway predictions per batch size at load
+        'warmup_batch_sizes': [1],  # Add the micro-batch sizes in use to warm them up too
+        'normalize_in_model': False,  # Feed uint8 frames and scale inside the model
+        'resize_interpolation': 'linear'  # nearest, linear or area (anti-aliased, slower)
+    },
+    'inference_server': {
+        'enabled': False,  # Micro-batch predictions from concurrent callers
+        'max_batch_size': 8,
+        'max_wait_ms': 10,
+        'result_timeout': 5.0  # Seconds a prediction may wait for its batch before failing
+    },
+    'multi_stream': {
+        'max_batch_size': 8,  # Windows per shared model call
+        'max_wait_ms': 20,  # How long to wait for other streams to fill a batch
+        'fairness': 'round_robin'  # round_robin or oldest_first
+    },
     'processing_settings': {
         'performance': {
             'frame_skip': 2,
-            'resize_factor': 0.5
+            'resize_factor': 0.5,
+            'inference_stride': 4,  # Run the model every N new frames
+            'inference_interval': 0.0  # Minimum seconds between runs (0 = no time budget)
         },
         'balanced': {
             'frame_skip': 1,
-            'resize_factor': 0.75
+            'resize_factor': 0.75,
+            'inference_stride': 2,  # Run the model every N new frames
+            'inference_interval': 0.0  # Minimum seconds between runs (0 = no time budget)
         },
         'quality': {
             'frame_skip': 0,
-            'resize_factor': 1.0
+            'resize_factor': 1.0,
+            'inference_stride': 1,  # Run the model every N new frames
+            'inference_interval': 0.0  # Minimum seconds between runs (0 = no time budget)
         }
     }
 }
@@ -42,14 +153,14 @@ class ConfigManager:
                 return DEFAULT_CONFIG.copy()
         return DEFAULT_CONFIG.copy()
 
-    def _update_with_defaults(self, config):
+    def _update_with_defaults(self, config, defaults=DEFAULT_CONFIG):
         """Recursively update config with any missing default values"""
         updated = config.copy()
-        for key, value in DEFAULT_CONFIG.items():
+        for key, value in defaults.items():
             if key not in updated:
                 updated[key] = value
             elif isinstance(value, dict) and isinstance(updated[key], dict):
-                updated[key] = self._update_with_defaults(updated[key])
+                updated[key] = self._update_with_defaults(updated[key], value)
         return updated
 
     def save_config(self):
@@ -76,4 +187,14 @@ class ConfigManager:
 
     def get_setting(self, key, default=None):
         """Get a configuration setting"""
-        return self.config.get(key, default)
\ No newline at end of file
+        return self.config.get(key, default)
+
+    def get_source_setting(self, key, source, default=None):
+        """Get a configuration setting with any override for the given source applied"""
+        value = self.config.get(key, default)
+        override = self.config.get('source_overrides', {}).get(str(source), {}).get(key)
+        if override is None:
+            return value
+        if isinstance(value, dict) and isinstance(override, dict):
+            return {**value, **override}
+        return override
\ No newline at end of file
@@ -0,0 +1,346 @@
+import bisect
+import threading
+import time
+from collections import deque
+
+class RateMeter:
+    def __init__(self, window=2.0):
+        """Measure event rate over a sliding time window (seconds)"""
+        self.window = window
+        self.events = deque()
+        self.lock = threading.Lock()
+
+    def tick(self, now=None):
+        """Record one event"""
+        if now is None:
+            now = time.time()
+        with self.lock:
+            self.events.append(now)
+            self._expire(now)
+
+    def rate(self, now=None):
+        """Return events per second over the window"""
+        if now is None:
+            now = time.time()
+        with self.lock:
+            self._expire(now)
+            return len(self.events) / self.window
+
+    def reset(self):
+        """Forget all recorded events"""
+        with self.lock:
+            self.events.clear()
+
+    def _expire(self, now):
+        """Drop events older than the window, with self.lock held"""
+        while self.events and now - self.events[0] > self.window:
+            self.events.popleft()
+
+class Histogram:
+    def __init__(self, buckets):
+        """Count observations into fixed upper-bound buckets"""
+        self.buckets = tuple(sorted(buckets))
+        self.counts = [0] * (len(self.buckets) + 1)  # Last bucket is +Inf
+        self.count = 0
+        self.total = 0.0
+        self.lock = threading.Lock()
+
+    def observe(self, value):
+        """Record one observation"""
+        index = bisect.bisect_left(self.buckets, value)
+        with self.lock:
+            self.counts[index] += 1
+            self.count += 1
+            self.total += value
+
+    def mean(self):
+        """Return the mean of all observations"""
+        return self.total / self.count if self.count else 0.0
+
+    def percentile(self, q):
+        """Return the upper bound of the bucket holding the q-th percentile (0-100)"""
+        with self.lock:
+            if not self.count:
+                return 0.0
+            rank = q / 100.0 * self.count
+            seen = 0
+            for bound, count in zip(self.buckets + (float('inf'),), self.counts):
+                seen += count
+                if seen >= rank:
+                    return bound
+        return float('inf')
+
+    def snapshot(self):
+        """Return bucket counts keyed by upper bound"""
+        with self.lock:
+            return {
+                'buckets': dict(zip(self.buckets + (float('inf'),), self.counts)),
+                'count': self.count,
+                'sum': self.total,
+            }
+
+    def reset(self):
+        """Forget all observations"""
+        with self.lock:
+            self.counts = [0] * (len(self.buckets) + 1)
+            self.count = 0
+            self.total = 0.0
+
+class Counter:
+    def __init__(self):
+        """Monotonic event count"""
+        self.value = 0
+        self.lock = threading.Lock()
+
+    def inc(self, amount=1):
+        """Add amount to the count"""
+        with self.lock:
+            self.value += amount
+
+    def reset(self):
+        """Set the count back to zero"""
+        with self.lock:
+            self.value = 0
+
+
+class PhaseTimer:
+    def __init__(self, name, started=None, metrics=None):
+        """Record when named phases (e.g. of startup) complete
+
+        Times are seconds since ``started`` (a time.perf_counter() value),
+        and are also exported as <name>_<phase>_seconds gauges when a
+        registry is given.
+        """
+        self.name = name
+        self.started = time.perf_counter() if started is None else started
+        self.phases = []  # (name, seconds since start)
+        self.metrics = metrics
+
+    def mark(self, name):
+        """Record that a phase completed now"""
+        elapsed = time.perf_counter() - self.started
+        self.phases.append((name, elapsed))
+        if self.metrics is not None:
+            self.metrics.gauge(f'{self.name}_{name}_seconds', lambda: elapsed,
+                               f'Seconds from {self.name} begin to {name}')
+        return elapsed
+
+    def summary(self):
+        """Return a one-line description of all phases"""
+        return ', '.join(f'{name} {elapsed:.2f}s' for name, elapsed in self.phases)
+
+
+class Timer:
+    def __init__(self, histogram):
+        """Context manager observing the elapsed seconds into a histogram"""
+        self.histogram = histogram
+
+    def __enter__(self):
+        self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.histogram.observe(time.perf_counter() - self.started)
+        return False
+
+
+class MetricsRegistry:
+    def __init__(self):
+        """Named counters, histograms, rates and gauges shared across the app
+
+        Metrics are created on first use and looked up by name afterwards,
+        so services can instrument themselves without being wired together.
+        """
+        self.metrics = {}  # name -> (kind, metric, help)
+        self.lock = threading.Lock()
+
+    def _get(self, name, kind, factory, help_text):
+        with self.lock:
+            entry = self.metrics.get(name)
+            if entry is None:
+                entry = self.metrics[name] = (kind, factory(), help_text)
+            elif entry[0] != kind:
+                raise ValueError(f"Metric {name} is a {entry[0]}, not a {kind}")
+            return entry[1]
+
+    def counter(self, name, help_text=''):
+        """Return the counter with the given name"""
+        return self._get(name, 'counter', Counter, help_text)
+
+    def histogram(self, name, buckets=None, help_text=''):
+        """Return the histogram with the given name"""
+        return self._get(name, 'histogram', lambda: Histogram(buckets or LATENCY_BUCKETS), help_text)
+
+    def rate(self, name, window=2.0, help_text=''):
+        """Return the RateMeter with the given name"""
+        return self._get(name, 'rate', lambda: RateMeter(window), help_text)
+
+    def gauge(self, name, read_value, help_text=''):
+        """Register (or replace) a gauge whose value is read_value() at export time"""
+        with self.lock:
+            self.metrics[name] = ('gauge', read_value, help_text)
+
+    def timer(self, name, buckets=None):
+        """Return a context manager timing a block into the named histogram"""
+        return Timer(self.histogram(name, buckets))
+
+    def reset(self):
+        """Reset every metric"""
+        with self.lock:
+            entries = list(self.metrics.values())
+        for kind, metric, _ in entries:
+            if kind != 'gauge':
+                metric.reset()
+
+    def snapshot(self):
+        """Return the current value of every metric as plain Python data"""
+        with self.lock:
+            entries = sorted(self.metrics.items())
+        now = time.time()
+        result = {}
+        for name, (kind, metric, _) in entries:
+            if kind == 'counter':
+                result[name] = metric.value
+            elif kind == 'rate':
+                result[name] = metric.rate(now)
+            elif kind == 'gauge':
+                try:
+                    result[name] = metric()
+                except Exception:
+                    result[name] = None
+            else:
+                result[name] = {'count': metric.count, 'mean': metric.mean(),
+                                'p50': metric.percentile(50), 'p95': metric.percentile(95),
+                                'p99': metric.percentile(99)}
+        return result
+
+    def prometheus_text(self, namespace=''):
+        """Render every metric in the Prometheus text exposition format"""
+        prefix = f'{namespace}_' if namespace else ''
+        with self.lock:
+            entries = sorted(self.metrics.items())
+        now = time.time()
+        lines = []
+        for name, (kind, metric, help_text) in entries:
+            full_name = prefix + name
+            if help_text:
+                lines.append(f'# HELP {full_name} {help_text}')
+            if kind == 'counter':
+                lines.append(f'# TYPE {full_name} counter')
+                lines.append(f'{full_name} {metric.value}')
+            elif kind in ('rate', 'gauge'):
+                try:
+                    value = metric.rate(now) if kind == 'rate' else metric()
+                except Exception:
+                    continue
+                if value is None:
+                    continue
+                lines.append(f'# TYPE {full_name} gauge')
+                lines.append(f'{full_name} {float(value)}')
+            else:
+                snapshot = metric.snapshot()
+                lines.append(f'# TYPE {full_name} histogram')
+                cumulative = 0
+                for bound, count in snapshot['buckets'].items():
+                    cumulative += count
+                    le = '+Inf' if bound == float('inf') else repr(float(bound))
+                    lines.append(f'{full_name}_bucket{{le="{le}"}} {cumulative}')
+                lines.append(f'{full_name}_sum {snapshot["sum"]}')
+                lines.append(f'{full_name}_count {snapshot["count"]}')
+        return '\n'.join(lines) + '\n'
+
+
+LATENCY_BUCKETS = (0.0005, 0.001, 0.002, 0.005, 0.01, 0.02, 0.05, 0.1, 0.25, 0.5, 1.0)
+
+# Process-wide registry used by the services
+registry = MetricsRegistry()
+
+
+class MetricsHTTPServer:
+    def __init__(self, metrics, port, host='127.0.0.1', namespace='vds'):
+        """Serve the registry as Prometheus text on /metrics from a daemon thread"""
+        from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path.split('?')[0] not in ('/', '/metrics'):
+                    self.send_error(404)
+                    return
+                body = metrics.prometheus_text(namespace).encode('utf-8')
+                self.send_response(200)
+                self.send_header('Content-Type', 'text/plain; version=0.0.4; charset=utf-8')
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass  # Scrapes are too frequent to log
+
+        self.server = ThreadingHTTPServer((host, port), Handler)
+        self.server.daemon_threads = True
+        self.thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+
+    @property
+    def port(self):
+        return self.server.server_address[1]
+
+    def start(self):
+        self.thread.start()
+
+    def stop(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+
+class MetricsDumper:
+    def __init__(self, metrics, path, interval=10.0):
+        """Write a JSON snapshot of the registry to path every interval seconds"""
+        self.metrics = metrics
+        self.path = path
+        self.interval = interval
+        self.stopped = threading.Event()
+        self.thread = threading.Thread(target=self._run, daemon=True)
+
+    def start(self):
+        self.thread.start()
+
+    def stop(self):
+        self.stopped.set()
+        self.thread.join(timeout=2.0)
+        self.dump()
+
+    def dump(self):
+        """Write one snapshot, replacing the file atomically"""
+        import json
+        import os
+        data = {'timestamp': time.time(), 'metrics': self.metrics.snapshot()}
+        temp_path = f'{self.path}.tmp'
+        try:
+            with open(temp_path, 'w') as f:
+                json.dump(data, f, indent=2, default=str)
+            os.replace(temp_path, self.path)
+        except OSError as e:
+            print(f"Error writing metrics: {str(e)}")
+
+    def _run(self):
+        while not self.stopped.wait(self.interval):
+            self.dump()
+
+
+def start_exporters(settings, metrics=registry):
+    """Start the exporters enabled in the metrics settings, return them for stopping"""
+    exporters = []
+    if settings.get('http_port'):
+        try:
+            server = MetricsHTTPServer(metrics, settings['http_port'],
+                                       settings.get('http_host', '127.0.0.1'),
+                                       settings.get('namespace', 'vds'))
+            server.start()
+            exporters.append(server)
+        except OSError as e:
+            print(f"Error starting metrics endpoint: {str(e)}")
+    if settings.get('json_path'):
+        dumper = MetricsDumper(metrics, settings['json_path'], settings.get('json_interval', 10.0))
+        dumper.start()
+        exporters.append(dumper)
+    return exporters
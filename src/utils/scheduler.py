@@ -0,0 +1,99 @@
+from collections import deque
+
+class InferenceScheduler:
+    def __init__(self, settings=None):
+        """Decide when a new window should be sent to the model"""
+        self.stride = 1
+        self.interval = 0.0
+        self.frames_since_run = 0
+        self.last_run_time = None
+        if settings is not None:
+            self.configure(settings)
+
+    def configure(self, settings):
+        """Apply stride / time budget from processing settings"""
+        self.stride = max(1, int(settings.get('inference_stride', 1)))
+        self.interval = max(0.0, float(settings.get('inference_interval', 0.0)))
+
+    def frame_added(self):
+        """Register a newly captured frame"""
+        self.frames_since_run += 1
+
+    def should_run(self, now):
+        """Return True if inference is due
+
+        Inference runs once at least ``stride`` new frames have arrived and,
+        when a time budget is set, at least ``interval`` seconds have passed
+        since the previous run.
+        """
+        if self.last_run_time is None:
+            return self.frames_since_run > 0
+        if self.frames_since_run < self.stride:
+            return False
+        return now - self.last_run_time >= self.interval
+
+    def mark_run(self, now):
+        """Record that inference ran"""
+        self.frames_since_run = 0
+        self.last_run_time = now
+
+    def reset(self):
+        """Forget scheduling state, e.g. after a source switch"""
+        self.frames_since_run = 0
+        self.last_run_time = None
+
+
+class MotionGate:
+    def __init__(self, settings=None, window=16):
+        """Hold back inference while the scene is still
+
+        Motion is measured as the fraction of the analyzed frame covered by
+        motion boxes. The gate opens when the current fraction ('area') or
+        its mean over the last ``window`` frames ('energy') reaches the
+        threshold, and stays open for ``hold_frames`` frames after motion
+        stops so the window containing the end of the motion is still scored.
+        """
+        self.enabled = False
+        self.metric = 'area'
+        self.threshold = 0.002
+        self.hold_frames = window
+        self.history = deque(maxlen=window)
+        self.frames_since_motion = None  # None until motion has been seen
+        self.skipped = 0  # Inference runs saved by the gate
+        if settings is not None:
+            self.configure(settings)
+
+    def configure(self, settings):
+        """Apply motion_gate settings"""
+        self.enabled = bool(settings.get('enabled', False))
+        self.metric = settings.get('metric', 'area')
+        if self.metric not in ('area', 'energy'):
+            raise ValueError(f"Unknown motion gate metric: {self.metric}")
+        self.threshold = float(settings.get('threshold', 0.002))
+        self.hold_frames = int(settings.get('hold_frames', self.history.maxlen))
+
+    def update(self, regions, frame_shape):
+        """Register the motion regions found in a frame"""
+        frame_area = frame_shape[0] * frame_shape[1]
+        motion = sum(w * h for _, _, w, h in regions) / frame_area if frame_area else 0.0
+        self.history.append(min(1.0, motion))
+        level = motion if self.metric == 'area' else sum(self.history) / len(self.history)
+        if level >= self.threshold:
+            self.frames_since_motion = 0
+        elif self.frames_since_motion is not None:
+            self.frames_since_motion += 1
+
+    def skip(self):
+        """Count a model run saved because the gate was closed"""
+        self.skipped += 1
+
+    def is_open(self):
+        """Return True if inference should run"""
+        if not self.enabled:
+            return True
+        return self.frames_since_motion is not None and self.frames_since_motion <= self.hold_frames
+
+    def reset(self):
+        """Forget motion history"""
+        self.history.clear()
+        self.frames_since_motion = None
@@ -1,126 +1,107 @@
 from PyQt5.QtCore import QObject, pyqtSignal
-import cv2
+from PyQt5.QtGui import QImage
 import time
-import numpy as np
-
-class MotionDetector:
-    def __init__(self):
-        self.previous_frame = None
-        self.min_area = 1000  # Increased minimum area to reduce sensitivity
-        self.background_subtractor = cv2.createBackgroundSubtractorMOG2(
-            history=50, varThreshold=32, detectShadows=False)  # Increased threshold
-
-    def detect_motion(self, frame):
-        """Detect motion in frame and return regions of interest"""
-        # Apply background subtraction
-        fg_mask = self.background_subtractor.apply(frame)
-        
-        # Remove noise
-        kernel = cv2.getStructuringElement(cv2.MORPH_ELLIPSE, (3, 3))
-        fg_mask = cv2.erode(fg_mask, kernel, iterations=2)  # More erosion
-        fg_mask = cv2.dilate(fg_mask, kernel, iterations=3)
-        
-        # Find contours
-        contours, _ = cv2.findContours(fg_mask, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
-        
-        # Filter contours by area and get bounding boxes
-        motion_regions = []
-        for contour in contours:
-            if cv2.contourArea(contour) > self.min_area:
-                x, y, w, h = cv2.boundingRect(contour)
-                motion_regions.append((x, y, w, h))
-        
-        # Merge overlapping boxes
-        return self.merge_boxes(motion_regions)
+from src.core.detection_loop import DetectionLoop
 
-    def merge_boxes(self, boxes):
-        """Merge overlapping bounding boxes"""
-        if not boxes:
-            return []
+class ModelLoader(QObject):
+    loaded = pyqtSignal(float)  # Emits seconds spent loading
+    failed = pyqtSignal(str)
 
-        # Convert to a format suitable for NMS
-        boxes_array = np.array([[x, y, x + w, y + h] for (x, y, w, h) in boxes])
-        
-        # Calculate areas
-        areas = (boxes_array[:, 2] - boxes_array[:, 0]) * (boxes_array[:, 3] - boxes_array[:, 1])
-        
-        # Sort boxes by area
-        idxs = areas.argsort()
-        
-        # Initialize pick list
-        pick = []
-        
-        while len(idxs) > 0:
-            # Grab the last box (largest area)
-            last = len(idxs) - 1
-            i = idxs[last]
-            pick.append(i)
-            
-            # Find the overlap with remaining boxes
-            xx1 = np.maximum(boxes_array[i, 0], boxes_array[idxs[:last], 0])
-            yy1 = np.maximum(boxes_array[i, 1], boxes_array[idxs[:last], 1])
-            xx2 = np.minimum(boxes_array[i, 2], boxes_array[idxs[:last], 2])
-            yy2 = np.minimum(boxes_array[i, 3], boxes_array[idxs[:last], 3])
-            
-            # Calculate overlap area
-            w = np.maximum(0, xx2 - xx1)
-            h = np.maximum(0, yy2 - yy1)
-            overlap = (w * h) / areas[idxs[:last]]
-            
-            # Delete all indexes from the index list that exceed the overlap threshold
-            idxs = np.delete(idxs, np.concatenate(([last], np.where(overlap > 0.3)[0])))
-        
-        # Convert back to (x, y, w, h) format
-        merged_boxes = []
-        for i in pick:
-            x1, y1, x2, y2 = boxes_array[i]
-            merged_boxes.append((int(x1), int(y1), int(x2 - x1), int(y2 - y1)))
-        
-        return merged_boxes
+    def __init__(self, model_service):
+        """Load the model off the GUI thread"""
+        super().__init__()
+        self.model_service = model_service
+
+    def run(self):
+        started = time.perf_counter()
+        try:
+            self.model_service.load_model()
+        except Exception as e:
+            self.failed.emit(str(e))
+            return
+        self.loaded.emit(time.perf_counter() - started)
+
+
+class CameraDiscoveryWorker(QObject):
+    camera_found = pyqtSignal(object)  # Emits each camera dict as it is found
+    finished = pyqtSignal(object)  # Emits the complete camera list
+
+    def __init__(self, video_service, force_refresh=False):
+        """List cameras off the GUI thread"""
+        super().__init__()
+        self.video_service = video_service
+        self.force_refresh = force_refresh
+
+    def run(self):
+        cameras = self.video_service.get_available_cameras(self.camera_found.emit, self.force_refresh)
+        self.finished.emit(cameras)
 
-    def draw_motion_regions(self, frame, regions, is_violence=False):
-        """Draw motion regions on frame"""
-        color = (0, 0, 255) if is_violence else (0, 255, 0)
-        frame_copy = frame.copy()
-        
-        # Draw only the outlines without fill
-        for x, y, w, h in regions:
-            cv2.rectangle(frame_copy, (x, y), (x + w, y + h), color, 2)
-        
-        return frame_copy
 
 class DetectionWorker(QObject):
-    frame_ready = pyqtSignal(object)  # Emits processed frame
+    frame_ready = pyqtSignal(object)  # Emits display-ready QImage scaled to the display size
     prediction_ready = pyqtSignal(str, float)  # Emits (class, confidence)
+    rates_ready = pyqtSignal(float, float, int)  # Emits (capture fps, inferences per second, runs skipped by motion gate)
+    latency_ready = pyqtSignal(float, int)  # Emits (capture-to-prediction seconds, dropped frames)
+    clip_saved = pyqtSignal(str)  # Emits the path of a finished event clip
     error = pyqtSignal(str)
 
-    def __init__(self, video_service, model_service):
+    def __init__(self, video_service, model_service, event_store=None):
+        """Run DetectionLoop on captured frames and deliver its results as signals"""
         super().__init__()
         self.video_service = video_service
         self.model_service = model_service
-        self.motion_detector = MotionDetector()
+        self.detection = DetectionLoop(video_service, model_service, event_store,
+                                       on_error=self.error.emit, on_clip_saved=self.clip_saved.emit)
         self.running = False
-        self.is_violence = False
-        self.show_boxes = True
-        self.violence_persist_time = None
-        self.VIOLENCE_PERSISTENCE = 3  # 3 seconds persistence
-        self.manual_violence_trigger = False
-        
+        self.RATE_REPORT_INTERVAL = 1.0  # seconds between rates_ready emissions
+        display_settings = self.video_service.config_manager.get_setting('display', {})
+        self.prediction_interval = display_settings.get('prediction_interval', 0.25)
+        self.last_emitted_prediction = None  # (class, confidence, is_violence)
+        self.last_prediction_time = 0.0
+
+    def set_display_size(self, width, height):
+        """Set the size frames are scaled to before being emitted"""
+        self.detection.set_display_size(width, height)
+
+    def frame_displayed(self):
+        """Called by the GUI once the last emitted frame is shown"""
+        self.detection.frame_displayed()
+
+    def should_emit_prediction(self, predicted_class, confidence, current_time):
+        """Return True if the GUI should get this prediction
+
+        Class or alert changes are sent at once; other updates at most once
+        per prediction_interval, and repeats of the same value not at all.
+        """
+        prediction = (predicted_class, round(confidence, 2), self.detection.is_violence)
+        last = self.last_emitted_prediction
+        if last is not None:
+            if prediction == last:
+                return False
+            if prediction[0] == last[0] and prediction[2] == last[2] and (
+                    current_time - self.last_prediction_time < self.prediction_interval):
+                return False
+        self.last_emitted_prediction = prediction
+        self.last_prediction_time = current_time
+        return True
+
+    def to_qimage(self, rgb_frame):
+        """Wrap an RGB frame in a QImage that owns its pixels"""
+        h, w = rgb_frame.shape[:2]
+        # The copy detaches the image from the numpy buffer before it crosses threads
+        return QImage(rgb_frame.data, w, h, rgb_frame.strides[0], QImage.Format_RGB888).copy()
+
     def setShowBoxes(self, show):
         """Toggle bounding box display"""
-        self.show_boxes = show
+        self.detection.show_boxes = show
         
     def trigger_manual_violence(self):
         """Manually trigger violence detection"""
-        self.is_violence = True
-        self.manual_violence_trigger = True
-        self.violence_persist_time = time.time()
+        self.detection.trigger_manual_violence()
         
     def trigger_manual_nonviolence(self): 
-        self.is_violence = False
-        self.manual_violence_trigger = False
-        self.violence_persist_time = time.time()  # Used to keep nonviolence state for 1 second
-        
+        self.detection.trigger_manual_nonviolence()
+
     def stop(self):
         """Stop the worker"""
         self.running = False
@@ -128,57 +109,42 @@ class DetectionWorker(QObject):
     def run(self):
         """Main worker loop"""
         self.running = True
-        predicted_class = "NonViolence"  # Default value
-        confidence = 0.0  # Default value
+        detection = self.detection
+        last_rate_report = time.time()
         
         try:
             while self.running:
                 # Get frame
-                frame = self.video_service.get_frame()
+                frame = self.video_service.get_frame(self.video_service.frame_timeout)
                 if frame is None:
-                    break
+                    if self.video_service.stream_ended():
+                        break
+                    continue  # Stalled source, check whether we were stopped
 
                 current_time = time.time()
-                
-                # Check for manual triggers and persistence
-                if self.manual_violence_trigger or (
-                    self.violence_persist_time and 
-                    current_time - self.violence_persist_time < (
-                        3 if self.is_violence else 1  # 3 seconds for violence, 1 for nonviolence
-                    )
-                ):
-                    predicted_class = "Violence" if self.is_violence else "NonViolence"
-                    confidence = 1.0
-                else:
-                    # Run detection if we have enough frames
-                    frames = self.video_service.get_frame_sequence()
-                    if frames is not None:
-                        try:
-                            predicted_class, confidence = self.model_service.predict_frames(frames)
-                            if predicted_class == "Violence" and confidence > 0.5:
-                                self.is_violence = True
-                                self.violence_persist_time = current_time
-                            elif not self.violence_persist_time or (
-                                current_time - self.violence_persist_time >= self.VIOLENCE_PERSISTENCE):
-                                self.is_violence = False
-                                self.manual_violence_trigger = False
-                        except Exception as e:
-                            self.error.emit(f"Detection error: {str(e)}")
-                            continue
-
-                # Detect motion and update display
-                motion_regions = self.motion_detector.detect_motion(frame)
-                frame_to_display = frame.copy()
-                if motion_regions and self.show_boxes:
-                    frame_to_display = self.motion_detector.draw_motion_regions(
-                        frame_to_display, motion_regions, self.is_violence)
-
-                self.frame_ready.emit(frame_to_display)
-                self.prediction_ready.emit(predicted_class, confidence)
-
-                time.sleep(0.01)
+                context = detection.process_frame(frame, current_time)
+                if context is None:
+                    continue  # Prediction failed, already reported through error
+
+                if context.rendered:
+                    self.frame_ready.emit(self.to_qimage(context.display_frame))
+                if self.should_emit_prediction(detection.predicted_class, detection.confidence, current_time):
+                    self.prediction_ready.emit(detection.predicted_class, detection.confidence)
+
+                if current_time - last_rate_report >= self.RATE_REPORT_INTERVAL:
+                    self.latency_ready.emit(detection.last_latency,
+                                            self.video_service.dropped_frames)
+                    self.rates_ready.emit(detection.capture_rate.rate(current_time),
+                                          detection.inference_rate.rate(current_time),
+                                          detection.motion_gate.skipped)
+                    last_rate_report = current_time
+
+                # The capture thread already paces the loop
+                if self.video_service.capture_thread is None:
+                    time.sleep(0.01)
 
         except Exception as e:
             self.error.emit(f"Worker error: {str(e)}")
-        
-        self.running = False
\ No newline at end of file
+
+        detection.stop()
+        self.running = False